@@ -0,0 +1,188 @@
+"""Benchmarks dos caminhos críticos da simulação e da análise estatística
+
+Exemplos:
+    python benchmarks/executar_benchmarks.py --rapido
+    python benchmarks/executar_benchmarks.py --salvar-baseline
+    python benchmarks/executar_benchmarks.py --tolerancia 1.3
+
+Cada caso é medido em tempo e pico de memória (tracemalloc, em uma execução
+separada). O tempo é o melhor de N repetições, cada uma com tantas
+chamadas quanto necessário para durar ao menos 0,2 s (como o `timeit`),
+dividido pelo número de chamadas; assim casos de microssegundos não ficam
+à mercê da resolução do relógio.
+
+Se existir um baseline, os resultados são comparados e o código de saída
+é 1 quando algum caso regride. A memória é a comparação estrita e
+portátil (`--tolerancia-memoria`); o tempo só conta como regressão acima
+de `--tolerancia` e de um piso absoluto de ruído (`--piso-ruido`). Os
+tempos dependem da máquina, por isso nenhum baseline é versionado: a CI
+deve gravá-lo no próprio executor, a partir do commit de referência
+(`--rapido --salvar-baseline`), antes de comparar.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from estatistica import AnalisadorEstatistico
+from gerador import gerar_dados_sinteticos
+from simulacao import SimuladorFilas, calcular_linha_tempo, calcular_metricas_mmc
+
+CAMINHO_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+TAMANHOS_PADRAO = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+TAMANHOS_RAPIDOS = [10 ** 3, 10 ** 4, 10 ** 5]
+SERVIDORES_PADRAO = [1, 10, 100, 500]
+UTILIZACAO_ALVO = 0.85
+# Diferença absoluta de tempo por chamada tratada como ruído de medição
+PISO_RUIDO = 5e-3
+CASOS_SIMULACAO = ['simular', 'simular_eventos', 'linha_tempo']
+
+
+def medir(funcao: Callable[[], object], repeticoes: int) -> Dict[str, float]:
+    """Mede o melhor tempo por chamada entre as repetições e o pico de memória alocada"""
+    # Tempo de CPU do processo: menos sensível a outras cargas na mesma máquina
+    cronometro = timeit.Timer(funcao, timer=time.process_time)
+    # Número de chamadas para que cada repetição dure ao menos 0,2 s
+    numero, _ = cronometro.autorange()
+    tempo = min(cronometro.repeat(repeat=repeticoes, number=numero)) / numero
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'tempo': tempo, 'memoria_pico': float(pico)}
+
+
+def montar_casos(tamanhos: List[int], servidores: List[int], distribuicao: str, semente: int,
+                 filtro: str = '') -> Iterator[Tuple[str, Callable[[], object]]]:
+    """Gera, sob demanda, os casos de benchmark sobre dados sintéticos com semente fixa
+
+    Só os casos cujo nome contém `filtro` são montados, e cada dataset e
+    simulador é criado quando chega a sua vez de ser medido, de modo que no
+    máximo um deles fica na memória. O tempo médio de atendimento é ajustado
+    para cada número de servidores de modo que a utilização fique em
+    UTILIZACAO_ALVO e o sistema seja estável.
+    """
+    for n in tamanhos:
+        nomes_simulacao = {c: {caso: f'{caso}/n={n}/c={c}' for caso in CASOS_SIMULACAO} for c in servidores}
+        nome_estatisticas = f'estatisticas/n={n}'
+        if filtro not in nome_estatisticas and not any(
+                filtro in nome for nomes in nomes_simulacao.values() for nome in nomes.values()):
+            continue
+
+        dados = gerar_dados_sinteticos(n, distribuicao, media_chegada=1.0, semente=semente)
+        if filtro in nome_estatisticas:
+            yield nome_estatisticas, lambda: AnalisadorEstatistico(dados).calcular_estatisticas_descritivas()
+        for c in servidores:
+            selecionados = {caso: nome for caso, nome in nomes_simulacao[c].items() if filtro in nome}
+            if not selecionados:
+                continue
+            dados_c = dados.assign(tempo_atendimento=dados['tempo_atendimento']
+                                   * (UTILIZACAO_ALVO * c / dados['tempo_atendimento'].mean()))
+            simulador = SimuladorFilas(c)
+            simulador.carregar_dados(dados_c)
+            funcoes = {
+                'simular': simulador.simular,
+                'simular_eventos': simulador.simular_eventos,
+                'linha_tempo': lambda simulador=simulador, c=c: calcular_linha_tempo(simulador.simular_eventos(), c)
+            }
+            for caso, nome in selecionados.items():
+                yield nome, funcoes[caso]
+            del dados_c, simulador, funcoes
+        del dados
+
+    # Núcleo de Erlang C com milhares de cenários de uma só vez
+    if filtro in 'erlang_c/cenarios=10000':
+        rng = np.random.default_rng(semente)
+        cenarios = rng.integers(1, max(servidores) + 1, 10_000)
+        cargas = cenarios * rng.uniform(0.5, 0.99, len(cenarios))
+        yield 'erlang_c/cenarios=10000', lambda: calcular_metricas_mmc(cargas, 1.0, cenarios)
+
+
+def comparar(resultados: pd.DataFrame, baseline: Dict[str, Dict[str, float]], tolerancia: float,
+             tolerancia_memoria: float, piso_ruido: float) -> pd.DataFrame:
+    """Acrescenta as razões em relação ao baseline e marca as regressões
+
+    O tempo só regride quando a razão passa de `tolerancia` e a diferença
+    absoluta passa de `piso_ruido` segundos; a memória, quando a razão passa
+    de `tolerancia_memoria`.
+    """
+    base = pd.DataFrame(baseline).T.reindex(resultados.index)
+    resultados = resultados.copy()
+    resultados['razao_tempo'] = resultados['tempo'] / base['tempo']
+    resultados['razao_memoria'] = resultados['memoria_pico'] / base['memoria_pico']
+    regressao_tempo = ((resultados['razao_tempo'] > tolerancia)
+                       & (resultados['tempo'] - base['tempo'] > piso_ruido))
+    resultados['regressao'] = regressao_tempo | (resultados['razao_memoria'] > tolerancia_memoria)
+    return resultados
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmarks do simulador de filas")
+    parser.add_argument('--tamanhos', type=lambda texto: [int(float(v)) for v in texto.split(',')],
+                        default=TAMANHOS_PADRAO, help="Números de pacientes, ex.: 1e3,1e5")
+    parser.add_argument('--servidores', type=lambda texto: [int(v) for v in texto.split(',')],
+                        default=SERVIDORES_PADRAO, help="Números de servidores, ex.: 1,10,500")
+    parser.add_argument('--rapido', action='store_true', help="Usa apenas até 1e5 pacientes")
+    parser.add_argument('--distribuicao', default='exponencial', help="exponencial, lognormal ou rajadas")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=2024)
+    parser.add_argument('--filtro', default='', help="Executa apenas os casos cujo nome contém o texto")
+    parser.add_argument('--baseline', default=CAMINHO_BASELINE)
+    parser.add_argument('--salvar-baseline', action='store_true', help="Grava os resultados como novo baseline")
+    parser.add_argument('--tolerancia', type=float, default=1.5,
+                        help="Razão máxima de tempo em relação ao baseline antes de acusar regressão")
+    parser.add_argument('--tolerancia-memoria', type=float, default=1.10,
+                        help="Razão máxima do pico de memória em relação ao baseline")
+    parser.add_argument('--piso-ruido', type=float, default=PISO_RUIDO,
+                        help="Diferença de tempo por chamada (s) abaixo da qual não há regressão")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = criar_parser().parse_args(argv)
+    tamanhos = TAMANHOS_RAPIDOS if args.rapido else args.tamanhos
+    medicoes = {}
+    for nome, funcao in montar_casos(tamanhos, args.servidores, args.distribuicao, args.semente, args.filtro):
+        medicoes[nome] = medir(funcao, args.repeticoes)
+        print(f"{nome}: {medicoes[nome]['tempo'] * 1e3:.3f} ms, {medicoes[nome]['memoria_pico'] / 2 ** 20:.1f} MiB",
+              flush=True)
+    resultados = pd.DataFrame(medicoes).T
+
+    if args.salvar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as arquivo:
+                baseline = json.load(arquivo)
+        baseline.update(medicoes)
+        with open(args.baseline, 'w') as arquivo:
+            json.dump(baseline, arquivo, indent=2, sort_keys=True)
+        print(f"Baseline gravado em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Nenhum baseline encontrado; use --salvar-baseline para criar um.")
+        return 0
+
+    with open(args.baseline) as arquivo:
+        comparacao = comparar(resultados, json.load(arquivo), args.tolerancia, args.tolerancia_memoria,
+                              args.piso_ruido)
+    print(comparacao.to_string(float_format=lambda valor: f"{valor:.3f}"))
+    regressoes = comparacao.index[comparacao['regressao']].tolist()
+    if regressoes:
+        print(f"Regressões: {', '.join(regressoes)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
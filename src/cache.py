@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+import threading
+
+
+class CacheLRU:
+    """Cache em memória com tamanho limitado e descarte do item menos usado
+
+    Seguro para uso concorrente: o Streamlit atende cada sessão em uma thread.
+    O cálculo de um valor ausente acontece fora da trava, então duas sessões
+    podem calculá-lo ao mesmo tempo, mas apenas um resultado é mantido.
+    """
+
+    def __init__(self, tamanho_maximo: int = 128):
+        self.tamanho_maximo = max(1, tamanho_maximo)
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter_ou_calcular(self, chave: Hashable, calcular: Callable[[], Any]) -> Any:
+        """Retorna o valor da chave, calculando-o com `calcular` se necessário"""
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            self.falhas += 1
+
+        valor = calcular()
+
+        with self._trava:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+        return valor
+
+    def limpar(self):
+        """Remove todos os itens do cache"""
+        with self._trava:
+            self._itens.clear()
+
+    def __contains__(self, chave: Hashable) -> bool:
+        with self._trava:
+            return chave in self._itens
+
+    def __len__(self) -> int:
+        with self._trava:
+            return len(self._itens)
+
+
+# Caches compartilhados entre reexecuções do Streamlit (o módulo é importado
+# uma única vez por processo, ao contrário do script da interface)
+cache_dados = CacheLRU(16)        # Hash do conteúdo e datasets carregados
+cache_resultados = CacheLRU(256)  # Estatísticas, intervalos, métricas e resumos compactos
+cache_figuras = CacheLRU(128)     # Figuras já renderizadas em PNG
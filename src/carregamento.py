@@ -0,0 +1,198 @@
+import pandas as pd
+import numpy as np
+from typing import Iterator, List, Optional, Tuple, Union, IO
+import hashlib
+import os
+import tempfile
+
+# Colunas obrigatórias dos arquivos de chegada/atendimento
+COLUNAS_TEMPO = ['tempo_chegada', 'tempo_atendimento']
+
+# Coluna opcional com a classe de prioridade (1 = mais urgente)
+COLUNA_PRIORIDADE = 'prioridade'
+
+# Número de linhas lidas por bloco no modo de leitura em fluxo
+TAMANHO_BLOCO_PADRAO = 500_000
+
+# Diretório onde ficam os datasets convertidos para o formato binário colunar
+DIRETORIO_CACHE_PADRAO = os.path.join(os.path.dirname(__file__), "..", "data", ".cache")
+
+
+class AcumuladorMomentos:
+    """Acumula contagem, média, co-momentos, mínimo e máximo por coluna
+
+    Os blocos são combinados com a fórmula paralela de Chan, então a memória
+    usada depende apenas do número de colunas, nunca do número de linhas.
+    """
+
+    def __init__(self, num_colunas: int):
+        self.n = 0
+        self.media = np.zeros(num_colunas)
+        self.comomentos = np.zeros((num_colunas, num_colunas))
+        self.min = np.full(num_colunas, np.inf)
+        self.max = np.full(num_colunas, -np.inf)
+
+    def atualizar(self, bloco: np.ndarray):
+        """Incorpora um bloco (linhas x colunas) já validado"""
+        n_bloco = bloco.shape[0]
+        if n_bloco == 0:
+            return
+        media_bloco = bloco.mean(axis=0)
+        desvios = bloco - media_bloco
+        comomentos_bloco = desvios.T @ desvios
+
+        n_total = self.n + n_bloco
+        delta = media_bloco - self.media
+        self.comomentos += comomentos_bloco + np.outer(delta, delta) * (self.n * n_bloco / n_total)
+        self.media += delta * (n_bloco / n_total)
+        self.n = n_total
+        np.minimum(self.min, bloco.min(axis=0), out=self.min)
+        np.maximum(self.max, bloco.max(axis=0), out=self.max)
+
+    def adicionar(self, linha: np.ndarray):
+        """Incorpora uma única linha já validada (atualização de Welford)"""
+        self.n += 1
+        delta = linha - self.media
+        self.media += delta / self.n
+        self.comomentos += np.outer(delta, linha - self.media)
+        np.minimum(self.min, linha, out=self.min)
+        np.maximum(self.max, linha, out=self.max)
+
+    @property
+    def covariancia(self) -> np.ndarray:
+        """Matriz de covariância amostral (NaN com menos de 2 linhas)"""
+        if self.n < 2:
+            return np.full(self.comomentos.shape, np.nan)
+        return self.comomentos / (self.n - 1)
+
+    @property
+    def variancia(self) -> np.ndarray:
+        """Variância amostral de cada coluna"""
+        return np.diag(self.covariancia).copy()
+
+
+def filtrar_bloco(bloco: pd.DataFrame, colunas: List[str]) -> np.ndarray:
+    """Converte um bloco para float e descarta linhas nulas ou não positivas"""
+    matriz = np.column_stack([pd.to_numeric(bloco[col], errors='coerce').to_numpy(dtype=float)
+                              for col in colunas])
+    # NaN falha na comparação, então uma única máscara cobre nulos e negativos
+    validas = (matriz > 0).all(axis=1)
+    return matriz[validas]
+
+
+def ler_cabecalho(origem: Union[str, IO]) -> List[str]:
+    """Lê apenas os nomes das colunas, sem consumir um buffer"""
+    if isinstance(origem, str):
+        return list(pd.read_csv(origem, nrows=0).columns)
+    posicao = origem.tell()
+    colunas = list(pd.read_csv(origem, nrows=0).columns)
+    origem.seek(posicao)
+    return colunas
+
+
+def ler_blocos_csv(origem: Union[str, IO], colunas: Optional[List[str]] = None,
+                   tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> Iterator[np.ndarray]:
+    """Lê o CSV em blocos, devolvendo matrizes float já validadas e filtradas"""
+    colunas = list(colunas or COLUNAS_TEMPO)
+    try:
+        leitor = pd.read_csv(origem, usecols=colunas, chunksize=tamanho_bloco)
+    except pd.errors.EmptyDataError:
+        raise
+    except ValueError:
+        raise ValueError(f"O arquivo CSV deve conter as colunas {colunas}")
+    with leitor:
+        for bloco in leitor:
+            yield filtrar_bloco(bloco, colunas)
+
+
+def carregar_em_blocos(origem: Union[str, IO], colunas: Optional[List[str]] = None,
+                       tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+                       manter_valores: bool = True) -> Tuple[Optional[np.ndarray], AcumuladorMomentos]:
+    """Carrega o CSV em fluxo, acumulando momentos bloco a bloco
+
+    Com `manter_valores=False` apenas os momentos são mantidos e o pico de
+    memória fica limitado ao tamanho de um bloco. Caso contrário, devolve
+    também uma matriz compacta (linhas x colunas) com os valores válidos,
+    preenchida em um único buffer que cresce no lugar (sem lista de blocos
+    nem concatenação final, que dobrariam o pico de memória).
+    """
+    colunas = list(colunas or COLUNAS_TEMPO)
+    acumulador = AcumuladorMomentos(len(colunas))
+    valores = np.empty((0, len(colunas))) if manter_valores else None
+    usados = 0
+    for bloco in ler_blocos_csv(origem, colunas, tamanho_bloco):
+        acumulador.atualizar(bloco)
+        if manter_valores:
+            necessario = usados + len(bloco)
+            if necessario > len(valores):
+                # Crescimento geométrico via realloc; nenhuma view do buffer existe ainda
+                valores.resize((max(necessario, int(len(valores) * 1.5)), len(colunas)), refcheck=False)
+            valores[usados:necessario] = bloco
+            usados = necessario
+
+    if manter_valores:
+        valores.resize((usados, len(colunas)), refcheck=False)
+    return valores, acumulador
+
+
+def carregar_csv(origem: Union[str, IO], colunas: Optional[List[str]] = None,
+                 tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> pd.DataFrame:
+    """Carrega o CSV em blocos e devolve um DataFrame compacto já filtrado"""
+    colunas = list(colunas or COLUNAS_TEMPO)
+    valores, _ = carregar_em_blocos(origem, colunas, tamanho_bloco)
+    return pd.DataFrame(valores, columns=colunas)
+
+
+def calcular_hash_conteudo(origem: Union[str, IO], tamanho_leitura: int = 1 << 20) -> str:
+    """Calcula o SHA-256 do conteúdo de um arquivo ou buffer, lendo em blocos"""
+    resumo = hashlib.sha256()
+    if isinstance(origem, str):
+        with open(origem, 'rb') as arquivo:
+            for parte in iter(lambda: arquivo.read(tamanho_leitura), b''):
+                resumo.update(parte)
+    else:
+        posicao = origem.tell()
+        for parte in iter(lambda: origem.read(tamanho_leitura), b''):
+            resumo.update(parte.encode() if isinstance(parte, str) else parte)
+        origem.seek(posicao)
+    return resumo.hexdigest()
+
+
+def carregar_dataset(origem: Union[str, IO], colunas: Optional[List[str]] = None,
+                     diretorio_cache: Optional[str] = None, tipo: type = np.float64,
+                     tamanho_bloco: int = TAMANHO_BLOCO_PADRAO, chave: Optional[str] = None) -> np.ndarray:
+    """Carrega o CSV a partir de um cache binário colunar indexado pelo hash do conteúdo
+
+    Na primeira carga o CSV é lido em blocos, validado e gravado como um
+    arquivo .npy em ordem de colunas (Fortran). As cargas seguintes apenas
+    mapeiam o arquivo em memória, sem nenhuma análise de texto. Retorna a
+    matriz (linhas x colunas) somente leitura, na ordem de `colunas`. Se o
+    hash do conteúdo já for conhecido, pode ser informado em `chave`.
+    """
+    colunas = list(colunas or COLUNAS_TEMPO)
+    tipo = np.dtype(tipo)
+    diretorio_cache = diretorio_cache or DIRETORIO_CACHE_PADRAO
+    chave = chave or calcular_hash_conteudo(origem)
+    nome = f"{chave}_{'-'.join(colunas)}_{tipo.name}.npy"
+    caminho = os.path.join(diretorio_cache, nome)
+
+    if not os.path.exists(caminho):
+        valores, _ = carregar_em_blocos(origem, colunas, tamanho_bloco)
+        os.makedirs(diretorio_cache, exist_ok=True)
+        # Escrita atômica em um temporário exclusivo: sessões do Streamlit são
+        # threads do mesmo processo, então o nome não pode depender só do PID
+        descritor, temporario = tempfile.mkstemp(suffix='.tmp', prefix=f"{nome}.", dir=diretorio_cache)
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                np.save(arquivo, np.asfortranarray(valores, dtype=tipo))
+            if not os.path.exists(caminho):
+                os.replace(temporario, caminho)
+        except OSError:
+            # Outra carga concorrente já publicou o mesmo conteúdo
+            if not os.path.exists(caminho):
+                raise
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    return np.load(caminho, mmap_mode='r')
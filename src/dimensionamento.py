@@ -0,0 +1,94 @@
+import numpy as np
+from typing import Optional, Union
+import math
+from simulacao import calcular_metricas_mmc
+
+
+def beta_halfin_whitt(p_espera: float) -> float:
+    """Fator de segurança β da regra da raiz quadrada para uma probabilidade de espera
+
+    No regime de Halfin-Whitt, com c = a + β·√a servidores, a probabilidade
+    de espera tende a [1 + β·Φ(β)/φ(β)]^-1, que decresce com β; o β é obtido
+    por bisseção.
+    """
+    def probabilidade(beta: float) -> float:
+        Phi = 0.5 * (1 + math.erf(beta / math.sqrt(2)))
+        phi = math.exp(-beta ** 2 / 2) / math.sqrt(2 * math.pi)
+        return 1 / (1 + beta * Phi / phi)
+
+    inferior, superior = 0.0, 10.0
+    for _ in range(60):
+        meio = (inferior + superior) / 2
+        if probabilidade(meio) > p_espera:
+            inferior = meio
+        else:
+            superior = meio
+    return superior
+
+
+def dimensionar_servidores(lambda_: Union[float, np.ndarray], mu: Union[float, np.ndarray],
+                           wq_max: Optional[float] = None, p_espera_max: Optional[float] = None,
+                           c_max: int = 10_000) -> np.ndarray:
+    """Encontra o menor número de servidores que atende à meta em cada faixa
+
+    `lambda_` e `mu` podem ter qualquer formato compatível (ex.: clínicas x
+    dias x horas). A meta é Wq <= `wq_max`, P_espera <= `p_espera_max` ou
+    ambas. Como Wq e P_espera decrescem com c, a busca parte do palpite da
+    regra da raiz quadrada, c = a + β·√a, avança em passos dobrados até
+    atender à meta e termina com bisseção, avaliando todas as faixas juntas
+    pelo núcleo de Erlang C. Faixas sem demanda recebem 0 e faixas em que a
+    meta não é atingida com até `c_max` servidores recebem -1.
+    """
+    if wq_max is None and p_espera_max is None:
+        raise ValueError("Informe wq_max e/ou p_espera_max")
+
+    lambda_, mu = np.broadcast_arrays(np.asarray(lambda_, dtype=float), np.asarray(mu, dtype=float))
+    formato = lambda_.shape
+    lambda_, mu = lambda_.ravel(), mu.ravel()
+    resultado = np.zeros(lambda_.shape, dtype=np.int64)
+    com_demanda = np.flatnonzero((lambda_ > 0) & (mu > 0))
+    if len(com_demanda) == 0:
+        return resultado.reshape(formato)
+    lambda_, mu = lambda_[com_demanda], mu[com_demanda]
+    a = lambda_ / mu
+
+    def atende(indices: np.ndarray, c: np.ndarray) -> np.ndarray:
+        metricas = calcular_metricas_mmc(lambda_[indices], mu[indices], c)
+        ok = np.ones(len(indices), dtype=bool)
+        if wq_max is not None:
+            ok &= metricas['Wq'] <= wq_max
+        if p_espera_max is not None:
+            ok &= metricas['P_espera'] <= p_espera_max
+        return ok
+
+    # Com c <= a o sistema é instável, então floor(a) nunca atende à meta
+    inferior = np.floor(a).astype(np.int64)
+    beta = beta_halfin_whitt(p_espera_max) if p_espera_max is not None else 1.0
+    superior = np.maximum(np.ceil(a + beta * np.sqrt(a)).astype(np.int64), inferior + 1)
+    superior = np.minimum(superior, c_max)
+
+    # Busca exponencial a partir do palpite até encontrar um c que atende
+    ok = atende(np.arange(len(a)), superior)
+    pendentes = np.flatnonzero(~ok)
+    passo = np.ones(len(a), dtype=np.int64)
+    while len(pendentes):
+        inferior[pendentes] = superior[pendentes]
+        superior[pendentes] = np.minimum(superior[pendentes] + passo[pendentes], c_max)
+        passo[pendentes] *= 2
+        ok_pendentes = atende(pendentes, superior[pendentes])
+        esgotados = ~ok_pendentes & (superior[pendentes] >= c_max)
+        superior[pendentes[esgotados]] = -1
+        pendentes = pendentes[~ok_pendentes & ~esgotados]
+
+    # Bisseção entre o último c que falha e o primeiro que atende
+    viaveis = superior > 0
+    ativos = np.flatnonzero(viaveis & (superior - inferior > 1))
+    while len(ativos):
+        meio = (inferior[ativos] + superior[ativos]) // 2
+        ok_meio = atende(ativos, meio)
+        superior[ativos[ok_meio]] = meio[ok_meio]
+        inferior[ativos[~ok_meio]] = meio[~ok_meio]
+        ativos = ativos[superior[ativos] - inferior[ativos] > 1]
+
+    resultado[com_demanda] = superior
+    return resultado.reshape(formato)
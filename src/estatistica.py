@@ -1,143 +1,555 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from typing import Tuple, Dict, List, Optional
+from typing import Callable, Tuple, Dict, List, Optional, Union, IO
+import math
+import re
+from carregamento import (COLUNAS_TEMPO, TAMANHO_BLOCO_PADRAO, AcumuladorMomentos, carregar_em_blocos,
+                          ler_blocos_csv)
+from online import ModaAproximada
+from ajuste import FAMILIAS, ajustar_distribuicoes
+from simulacao import calcular_metricas_mmc
+
+# Memória máxima ocupada pelas reamostras de um lote do bootstrap
+MEMORIA_BOOTSTRAP = 256 * 2 ** 20
+# Tamanho máximo de amostra para o qual o Shapiro-Wilk é confiável
+LIMITE_SHAPIRO = 5000
+
+Estatistica = Union[str, Callable[..., np.ndarray]]
+
+
+def _interpretar_estatistica(estatistica: Estatistica) -> Tuple[str, Optional[float]]:
+    """Traduz 'media', 'mediana', 'pNN' (ex.: 'p90') ou uma função em (tipo, quantil)"""
+    if callable(estatistica):
+        return 'funcao', None
+    if estatistica == 'media':
+        return 'media', None
+    if estatistica == 'mediana':
+        return 'quantil', 0.5
+    percentil = re.fullmatch(r'p(\d+(?:\.\d+)?)', str(estatistica))
+    if percentil and 0 <= float(percentil.group(1)) <= 100:
+        return 'quantil', float(percentil.group(1)) / 100
+    raise ValueError("A estatística deve ser 'media', 'mediana', 'pNN' ou uma função f(amostras, axis)")
+
+
+def _avaliar(amostras: np.ndarray, estatistica: Estatistica) -> np.ndarray:
+    """Aplica a estatística ao longo do último eixo"""
+    tipo, q = _interpretar_estatistica(estatistica)
+    if tipo == 'media':
+        return amostras.mean(axis=-1)
+    if tipo == 'quantil':
+        return np.quantile(amostras, q, axis=-1)
+    return np.asarray(estatistica(amostras, axis=-1))
+
+
+def _reamostrar_quantil(ordenados: np.ndarray, q: float, num_reamostras: int,
+                        rng: np.random.Generator) -> np.ndarray:
+    """Quantil de cada reamostra sorteando diretamente as estatísticas de ordem
+
+    Reamostrar é sortear índices floor(n·U) nos dados ordenados, então a
+    (k+1)-ésima menor observação da reamostra é ordenados[floor(n·U_(k+1))],
+    com U_(k+1) ~ Beta(k+1, n-k); a seguinte é a menor das n-k-1 uniformes
+    restantes acima dela. O resultado tem a mesma distribuição do bootstrap
+    com `np.quantile` (interpolação linear), em O(B) em vez de O(B·n).
+    """
+    n = len(ordenados)
+    h = (n - 1) * q
+    k = int(math.floor(h))
+    fracao = h - k
+    u = rng.beta(k + 1, n - k, num_reamostras)
+    inferior = ordenados[np.minimum((u * n).astype(np.int64), n - 1)]
+    if fracao == 0 or k + 1 >= n:
+        return inferior
+    u_seguinte = u + (1 - u) * -np.expm1(np.log(rng.random(num_reamostras)) / (n - k - 1))
+    superior = ordenados[np.minimum((u_seguinte * n).astype(np.int64), n - 1)]
+    return inferior + fracao * (superior - inferior)
+
+
+def _reamostrar(valores: np.ndarray, estatistica: Estatistica, num_reamostras: int,
+                rng: np.random.Generator, comprimento_bloco: int, memoria_maxima: int) -> np.ndarray:
+    """Distribuição bootstrap da estatística
+
+    Sem blocos, quantis usam `_reamostrar_quantil` e a média, quando há
+    poucos valores distintos (tempos arredondados), sorteia as contagens de
+    cada valor por uma multinomial. Nos demais casos as reamostras formam uma
+    matriz de índices B x n, gerada em lotes limitados por `memoria_maxima` e
+    reduzida ao longo do eixo das observações.
+    """
+    n = len(valores)
+    tipo, q = _interpretar_estatistica(estatistica)
+    resultado = np.empty(num_reamostras)
+
+    if comprimento_bloco <= 1 and tipo == 'quantil':
+        return _reamostrar_quantil(np.sort(valores), q, num_reamostras, rng)
+    if comprimento_bloco <= 1 and tipo == 'media':
+        unicos, contagens = np.unique(valores, return_counts=True)
+        if 4 * len(unicos) < n:
+            lote = max(1, memoria_maxima // (8 * len(unicos)))
+            for inicio in range(0, num_reamostras, lote):
+                pesos = rng.multinomial(n, contagens / n, size=min(lote, num_reamostras - inicio))
+                resultado[inicio:inicio + len(pesos)] = pesos @ unicos / n
+            return resultado
+
+    tipo_indice = np.int32 if n < 2 ** 31 - comprimento_bloco else np.int64
+    lote = max(1, memoria_maxima // (n * (8 + np.dtype(tipo_indice).itemsize)))
+    deslocamentos = np.arange(comprimento_bloco, dtype=tipo_indice)
+    num_blocos = -(-n // comprimento_bloco)
+    for inicio in range(0, num_reamostras, lote):
+        tamanho = min(lote, num_reamostras - inicio)
+        if comprimento_bloco > 1:
+            # Bootstrap de blocos circular: preserva a autocorrelação dentro dos blocos
+            partidas = rng.integers(0, n, (tamanho, num_blocos, 1), dtype=tipo_indice)
+            indices = ((partidas + deslocamentos) % n).reshape(tamanho, -1)[:, :n]
+        else:
+            indices = rng.integers(0, n, (tamanho, n), dtype=tipo_indice)
+        resultado[inicio:inicio + tamanho] = _avaliar(valores[indices], estatistica)
+    return resultado
+
+
+def _jackknife(valores: np.ndarray, estatistica: Estatistica, comprimento_bloco: int) -> np.ndarray:
+    """Valores de jackknife usados na aceleração do BCa
+
+    Média e quantis sem blocos têm forma fechada em O(n); os demais casos
+    removem um grupo contíguo por vez (no máximo 200 grupos).
+    """
+    n = len(valores)
+    tipo, q = _interpretar_estatistica(estatistica)
+    if comprimento_bloco <= 1 and tipo == 'media':
+        return (valores.sum() - valores) / (n - 1)
+    if comprimento_bloco <= 1 and tipo == 'quantil':
+        # Sem x_(j), a i-ésima ordem da amostra restante é x_(i) se i < j, senão x_(i+1)
+        ordenados = np.sort(valores)
+        h = (n - 2) * q
+        k = int(math.floor(h))
+        j = np.arange(n)
+        inferior = np.where(k < j, ordenados[k], ordenados[min(k + 1, n - 1)])
+        superior = np.where(k + 1 < j, ordenados[min(k + 1, n - 1)], ordenados[min(k + 2, n - 1)])
+        return inferior + (h - k) * (superior - inferior)
+
+    num_grupos = min(200, n // max(1, comprimento_bloco))
+    limites = np.linspace(0, n, num_grupos + 1).astype(np.int64)
+    return np.array([float(_avaliar(np.concatenate([valores[:a], valores[b:]]), estatistica))
+                     for a, b in zip(limites[:-1], limites[1:])])
+
+
+def intervalo_bootstrap(valores: np.ndarray, estatistica: Estatistica = 'media', confianca: float = 0.95,
+                        num_reamostras: int = 10_000, metodo: str = 'bca', comprimento_bloco: int = 1,
+                        semente: Optional[int] = None,
+                        memoria_maxima: int = MEMORIA_BOOTSTRAP) -> Tuple[float, float]:
+    """Intervalo de confiança bootstrap para uma estatística de uma amostra
+
+    `metodo` é 'percentil' ou 'bca' (com correção de viés e aceleração). Para
+    séries autocorrelacionadas, como as esperas de uma simulação
+    (`traco['espera']`), use `comprimento_bloco` > 1 para o bootstrap de
+    blocos, com blocos bem maiores que o tempo de correlação.
+    """
+    if metodo not in ('percentil', 'bca'):
+        raise ValueError("O método deve ser 'percentil' ou 'bca'")
+    valores = np.ascontiguousarray(valores, dtype=float)
+    valores = valores[~np.isnan(valores)]
+    comprimento_bloco = max(1, int(comprimento_bloco))
+    if len(valores) < 3:
+        return (float('nan'), float('nan'))
+
+    from scipy import stats
+
+    rng = np.random.default_rng(semente)
+    distribuicao = _reamostrar(valores, estatistica, num_reamostras, rng, comprimento_bloco, memoria_maxima)
+    alfa = (1 - confianca) / 2
+    niveis = np.array([alfa, 1 - alfa])
+
+    if metodo == 'bca':
+        estimativa = float(_avaliar(valores, estatistica))
+        # Correção de viés: proporção das reamostras abaixo da estimativa (empates contam metade)
+        proporcao = (np.sum(distribuicao < estimativa) + 0.5 * np.sum(distribuicao == estimativa)) / num_reamostras
+        z0 = stats.norm.ppf(proporcao)
+        desvios = _jackknife(valores, estatistica, comprimento_bloco)
+        desvios = desvios.mean() - desvios
+        soma_quadrados = (desvios ** 2).sum()
+        aceleracao = (desvios ** 3).sum() / (6 * soma_quadrados ** 1.5) if soma_quadrados > 0 else 0.0
+        z = stats.norm.ppf(niveis)
+        niveis = stats.norm.cdf(z0 + (z0 + z) / (1 - aceleracao * (z0 + z)))
+        if not np.isfinite(niveis).all():
+            return (float('nan'), float('nan'))
+
+    inferior, superior = np.quantile(distribuicao, niveis)
+    return (float(inferior), float(superior))
+
 
 class AnalisadorEstatistico:
-    def __init__(self, dados: pd.DataFrame):
-        # Fazer uma cópia para não modificar o DataFrame original
-        self.dados = dados.copy()
+    def __init__(self, dados: pd.DataFrame, colunas_grupo: Optional[List[str]] = None):
+        # A filtragem gera um novo DataFrame, então o original não é modificado
+        self.dados = dados
+        # Referência (sem cópia) aos dados antes da filtragem, para reagrupar por outras colunas
+        self._dados_originais = dados
+        # Colunas categóricas (ex.: médico, especialidade, dia da semana), mesmo que numéricas
+        self.colunas_grupo = list(colunas_grupo or [])
         self._validar_dados()
-        
+        self._momentos = None  # Cache dos momentos compartilhados
+
+    @classmethod
+    def de_matriz(cls, valores: np.ndarray, colunas: Optional[List[str]] = None) -> 'AnalisadorEstatistico':
+        """Cria o analisador a partir de uma matriz já validada, sem copiá-la
+
+        Útil para datasets colunares mapeados em memória por `carregar_dataset`.
+        """
+        analisador = cls.__new__(cls)
+        analisador.dados = pd.DataFrame(valores, columns=list(colunas or COLUNAS_TEMPO), copy=False)
+        analisador.colunas = list(analisador.dados.columns)
+        analisador.colunas_grupo = []
+        analisador._dados_originais = analisador.dados
+        analisador._momentos = None
+        return analisador
+
+    @classmethod
+    def de_csv(cls, origem: Union[str, IO], colunas: Optional[List[str]] = None,
+               tamanho_bloco: int = TAMANHO_BLOCO_PADRAO, manter_valores: bool = True,
+               resolucao: float = 0.1) -> 'AnalisadorEstatistico':
+        """Cria o analisador lendo o CSV em blocos já validados e filtrados
+
+        Os momentos acumulados durante a leitura alimentam o cache, de modo que
+        não é necessária uma nova passada sobre os dados. Com
+        `manter_valores=False` a memória fica limitada a um bloco: os valores
+        são descartados e mediana e moda são aproximadas por contagens em
+        faixas de `resolucao` (erro de até meia resolução). Nesse modo,
+        bootstrap, testes de normalidade e ajuste de distribuições, que
+        precisam dos valores, levantam ValueError.
+        """
+        colunas = list(colunas or COLUNAS_TEMPO)
+        if manter_valores:
+            valores, acumulador = carregar_em_blocos(origem, colunas, tamanho_bloco)
+            contagens = None
+        else:
+            valores = np.empty((0, len(colunas)))
+            acumulador = AcumuladorMomentos(len(colunas))
+            contagens = [ModaAproximada(resolucao) for _ in colunas]
+            for bloco in ler_blocos_csv(origem, colunas, tamanho_bloco):
+                acumulador.atualizar(bloco)
+                for j, contagem in enumerate(contagens):
+                    contagem.adicionar_bloco(bloco[:, j])
+
+        analisador = cls.de_matriz(valores, colunas)
+        if acumulador.n > 0:
+            analisador._momentos = {
+                'matriz': valores if manter_valores else None,
+                'n': acumulador.n,
+                'media': acumulador.media,
+                'covariancia': acumulador.covariancia,
+                'variancia': acumulador.variancia,
+                'min': acumulador.min,
+                'max': acumulador.max,
+                'contagens': contagens
+            }
+        return analisador
+
+    def _num_linhas(self) -> int:
+        """Número de linhas válidas, inclusive no modo limitado (sem os valores)"""
+        return self._momentos['n'] if self._momentos is not None else len(self.dados)
+
+    def _valores_coluna(self, j: int) -> np.ndarray:
+        """Valores da coluna j; indisponíveis quando o CSV foi lido sem mantê-los"""
+        matriz = self._calcular_momentos()['matriz']
+        if matriz is None:
+            raise ValueError("Operação indisponível: os valores não foram mantidos (manter_valores=False)")
+        return matriz[:, j]
+
     def _validar_dados(self):
-        """Valida os dados de entrada e trata valores ausentes ou inválidos"""
-        # Remover valores nulos ou negativos
-        self.dados = self.dados.dropna()
-        for coluna in self.dados.columns:
-            self.dados = self.dados[self.dados[coluna] > 0]
+        """Valida os dados de entrada e trata valores ausentes ou inválidos
+
+        Apenas as colunas numéricas fora de `colunas_grupo` são analisadas e
+        precisam ser positivas; as colunas categóricas só precisam estar
+        preenchidas.
+        """
+        numericas = self.dados.select_dtypes(include='number').columns
+        self.colunas = [coluna for coluna in numericas if coluna not in self.colunas_grupo]
+        categoricas = [coluna for coluna in self.dados.columns if coluna not in self.colunas]
+        # Remover valores nulos ou negativos com uma única máscara
+        # (comparações com NaN resultam em False)
+        validas = (self.dados[self.colunas] > 0).all(axis=1)
+        if categoricas:
+            validas &= self.dados[categoricas].notna().all(axis=1)
+        self.dados = self.dados.loc[validas]
         
+    def _calcular_momentos(self) -> dict:
+        """Calcula em lote, para todas as colunas, os momentos compartilhados
+
+        O resultado fica em cache para que intervalos de confiança e correlação
+        reutilizem médias, variâncias e covariâncias sem recalculá-las.
+        """
+        if self._momentos is not None:
+            return self._momentos
+
+        matriz = self.dados[self.colunas].to_numpy(dtype=float)
+        n = matriz.shape[0]
+        media = matriz.mean(axis=0)
+        desvios = matriz - media
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Matriz de covariância amostral: a diagonal traz as variâncias
+            covariancia = (desvios.T @ desvios) / (n - 1) if n > 1 else np.full((matriz.shape[1],) * 2, np.nan)
+        del desvios
+
+        self._momentos = {
+            'matriz': matriz,
+            'n': n,
+            'media': media,
+            'covariancia': covariancia,
+            'variancia': np.diag(covariancia).copy(),
+            'min': matriz.min(axis=0),
+            'max': matriz.max(axis=0),
+            'contagens': None
+        }
+        return self._momentos
+
+    @staticmethod
+    def _mediana_colunas(matriz: np.ndarray) -> np.ndarray:
+        """Mediana de cada coluna via np.partition (seleção em O(n))"""
+        n = matriz.shape[0]
+        meio = n // 2
+        if n % 2 == 0:
+            particionada = np.partition(matriz, [meio - 1, meio], axis=0)
+            return (particionada[meio - 1] + particionada[meio]) / 2
+        return np.partition(matriz, meio, axis=0)[meio]
+
+    @staticmethod
+    def _moda_coluna(valores: np.ndarray) -> float:
+        """Moda via np.unique; em empate vence o valor que aparece primeiro"""
+        unicos, primeiro_indice, contagens = np.unique(valores, return_index=True, return_counts=True)
+        candidatos = contagens == contagens.max()
+        return unicos[candidatos][np.argmin(primeiro_indice[candidatos])]
+
     def calcular_estatisticas_descritivas(self) -> dict:
         """Calcula estatísticas descritivas dos tempos"""
-        if self.dados.empty:
+        if self._num_linhas() == 0:
             return {col: {stat: float('nan') for stat in ['media', 'mediana', 'moda', 'variancia', 'desvio_padrao', 
                                                          'min', 'max', 'amplitude', 'coef_variacao']} 
-                    for col in self.dados.columns}
+                    for col in self.colunas}
         
+        momentos = self._calcular_momentos()
+        matriz = momentos['matriz']
+        if matriz is None:
+            # Modo limitado: mediana e moda aproximadas pelas contagens por faixa
+            medianas = [contagem.quantil(0.5) for contagem in momentos['contagens']]
+            modas = [contagem.moda for contagem in momentos['contagens']]
+        else:
+            medianas = self._mediana_colunas(matriz)
+            modas = [self._moda_coluna(matriz[:, j]) for j in range(matriz.shape[1])]
+        desvios_padrao = np.sqrt(momentos['variancia'])
+
         estatisticas = {}
-        for coluna in self.dados.columns:
-            # Converter para lista para garantir cálculos corretos
-            valores = self.dados[coluna].tolist()
-            
-            # Cálculos básicos usando métodos nativos do Python
-            media = sum(valores) / len(valores)
-            valores_ordenados = sorted(valores)
-            n = len(valores)
-            
-            # Cálculo da mediana
-            if n % 2 == 0:
-                mediana = (valores_ordenados[n//2 - 1] + valores_ordenados[n//2]) / 2
-            else:
-                mediana = valores_ordenados[n//2]
-            
-            # Cálculo da moda
-            contagem = {}
-            for valor in valores:
-                contagem[valor] = contagem.get(valor, 0) + 1
-            max_contagem = max(contagem.values())
-            moda = [k for k, v in contagem.items() if v == max_contagem][0]
-            
-            # Cálculo da variância e desvio padrão
-            variancia = sum((x - media) ** 2 for x in valores) / (len(valores) - 1)  # Variância amostral
-            desvio_padrao = variancia ** 0.5
-            
+        for j, coluna in enumerate(self.colunas):
+            media = float(momentos['media'][j])
+            desvio_padrao = float(desvios_padrao[j])
             estatisticas[coluna] = {
                 'media': media,
-                'mediana': mediana,
-                'moda': moda,
-                'variancia': variancia,
+                'mediana': float(medianas[j]),
+                'moda': float(modas[j]),
+                'variancia': float(momentos['variancia'][j]),
                 'desvio_padrao': desvio_padrao,
-                'min': min(valores),
-                'max': max(valores),
-                'amplitude': max(valores) - min(valores),
+                'min': float(momentos['min'][j]),
+                'max': float(momentos['max'][j]),
+                'amplitude': float(momentos['max'][j] - momentos['min'][j]),
                 'coef_variacao': (desvio_padrao / media) * 100 if media > 0 else float('nan')  # CV em percentual
             }
         return estatisticas
     
     def calcular_intervalo_confianca(self, coluna: str, confianca: float = 0.95) -> Tuple[float, float]:
         """Calcula intervalo de confiança para uma coluna usando distribuição t-Student"""
-        if coluna not in self.dados.columns or self.dados.empty:
+        if coluna not in self.colunas or self._num_linhas() == 0:
             return (float('nan'), float('nan'))
             
-        # Converter para lista
-        dados = self.dados[coluna].tolist()
-        if len(dados) < 2:  # Precisa de pelo menos 2 pontos para calcular o intervalo
+        momentos = self._calcular_momentos()
+        n = momentos['n']
+        if n < 2:  # Precisa de pelo menos 2 pontos para calcular o intervalo
             return (float('nan'), float('nan'))
             
-        # Cálculos usando métodos nativos do Python
-        n = len(dados)
-        media = sum(dados) / n
-        variancia = sum((x - media) ** 2 for x in dados) / (n - 1)
-        desvio_padrao = variancia ** 0.5
-        erro_padrao = desvio_padrao / (n ** 0.5)
+        j = self.colunas.index(coluna)
+        media = float(momentos['media'][j])
+        erro_padrao = float(np.sqrt(momentos['variancia'][j] / n))
         
-        # Valor crítico da distribuição t
+        # Valor crítico da distribuição t (SciPy é importado apenas quando usado)
+        from scipy import stats
         t_crit = stats.t.ppf((1 + confianca) / 2, n - 1)
         
         # Margem de erro
         margem_erro = t_crit * erro_padrao
         
         return (media - margem_erro, media + margem_erro)
-    
+
+    def calcular_intervalo_bootstrap(self, coluna: str, estatistica: Estatistica = 'media',
+                                     confianca: float = 0.95, num_reamostras: int = 10_000,
+                                     metodo: str = 'bca', semente: Optional[int] = None) -> Tuple[float, float]:
+        """Calcula intervalo de confiança bootstrap (percentil ou BCa) para uma coluna
+
+        Não supõe normalidade, o que o torna adequado a tempos assimétricos e a
+        estatísticas como 'mediana' ou 'p90'. Veja `intervalo_bootstrap`.
+        """
+        if coluna not in self.colunas or self._num_linhas() == 0:
+            return (float('nan'), float('nan'))
+        j = self.colunas.index(coluna)
+        return intervalo_bootstrap(self._valores_coluna(j), estatistica, confianca,
+                                   num_reamostras, metodo, semente=semente)
+
     def testar_normalidade(self, coluna: str) -> Dict[str, float]:
-        """Testa se os dados seguem uma distribuição normal usando múltiplos testes"""
-        if coluna not in self.dados.columns or self.dados.empty:
+        """Testa se os dados seguem uma distribuição normal usando múltiplos testes
+
+        O Shapiro-Wilk só é confiável até 5000 observações; acima disso é
+        aplicado a uma subamostra aleatória (semente fixa) desse tamanho. O KS
+        usa a média e o desvio padrão em cache. Para comparar outras famílias
+        (exponencial, gama, lognormal), use `ajustar_distribuicoes`.
+        """
+        if coluna not in self.colunas or self._num_linhas() == 0:
             return {'shapiro_p': float('nan'), 'ks_p': float('nan')}
-            
-        dados = self.dados[coluna].dropna().tolist()
-        if len(dados) < 3:  # Precisa de pelo menos 3 pontos para os testes
+
+        momentos = self._calcular_momentos()
+        if momentos['n'] < 3:  # Precisa de pelo menos 3 pontos para os testes
             return {'shapiro_p': float('nan'), 'ks_p': float('nan')}
-        
+        j = self.colunas.index(coluna)
+        dados = self._valores_coluna(j)
+
+        from scipy import stats
+
         # Teste de Shapiro-Wilk (melhor para amostras pequenas)
-        shapiro_stat, shapiro_p = stats.shapiro(dados)
-        
+        amostra = dados
+        if len(dados) > LIMITE_SHAPIRO:
+            amostra = dados[np.random.default_rng(0).choice(len(dados), LIMITE_SHAPIRO, replace=False)]
+        shapiro_stat, shapiro_p = stats.shapiro(amostra)
+
         # Teste de Kolmogorov-Smirnov
-        ks_stat, ks_p = stats.kstest(dados, 'norm', args=(sum(dados)/len(dados), 
-                                                         (sum((x - sum(dados)/len(dados)) ** 2 for x in dados) / (len(dados) - 1)) ** 0.5))
-        
+        ks_stat, ks_p = stats.kstest(dados, 'norm', args=(momentos['media'][j], np.sqrt(momentos['variancia'][j])))
+
         return {
             'shapiro_p': shapiro_p,
             'ks_p': ks_p,
             'e_normal': shapiro_p > 0.05 and ks_p > 0.05  # Consideramos normal se ambos os p-valores > 0.05
         }
     
+    def ajustar_distribuicoes(self, coluna: str, familias: List[str] = FAMILIAS,
+                              criterio: str = 'ad') -> Optional[pd.DataFrame]:
+        """Ajusta exponencial, gama, lognormal e normal a uma coluna e as ordena pela aderência
+
+        Veja `ajustar_distribuicoes` em `ajuste`.
+        """
+        if coluna not in self.colunas or self._num_linhas() == 0:
+            return None
+        j = self.colunas.index(coluna)
+        return ajustar_distribuicoes(self._valores_coluna(j), familias, criterio)
+
     def calcular_correlacao(self) -> Optional[float]:
         """Calcula a correlação entre as colunas do DataFrame"""
-        if len(self.dados.columns) < 2 or self.dados.empty:
+        if len(self.colunas) < 2 or self._num_linhas() == 0:
             return None
             
         # Assumindo que queremos a correlação entre as duas primeiras colunas
-        col1, col2 = self.dados.columns[0], self.dados.columns[1]
+        momentos = self._calcular_momentos()
+        covariancia = momentos['covariancia']
         
-        # Converter para listas
-        x = self.dados[col1].tolist()
-        y = self.dados[col2].tolist()
-        
-        # Cálculo da correlação de Pearson
-        n = len(x)
-        media_x = sum(x) / n
-        media_y = sum(y) / n
-        
-        # Cálculo da covariância
-        cov = sum((x[i] - media_x) * (y[i] - media_y) for i in range(n)) / (n - 1)
-        
-        # Cálculo dos desvios padrão
-        std_x = (sum((val - media_x) ** 2 for val in x) / (n - 1)) ** 0.5
-        std_y = (sum((val - media_y) ** 2 for val in y) / (n - 1)) ** 0.5
+        # Desvios padrão a partir da diagonal da matriz de covariância
+        std_x = np.sqrt(covariancia[0, 0])
+        std_y = np.sqrt(covariancia[1, 1])
         
         # Correlação de Pearson
         if std_x > 0 and std_y > 0:
-            return cov / (std_x * std_y)
+            return float(covariancia[0, 1] / (std_x * std_y))
         else:
-            return 0.0
\ No newline at end of file
+            return 0.0
+
+    def calcular_matriz_correlacao(self) -> Optional[pd.DataFrame]:
+        """Matriz de correlação de Pearson entre todas as colunas numéricas
+
+        Obtida da matriz de covariância em cache, sem nova passada pelos dados.
+        """
+        if len(self.colunas) < 2 or self._num_linhas() == 0:
+            return None
+        covariancia = self._calcular_momentos()['covariancia']
+        desvios = np.sqrt(np.diag(covariancia))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlacao = covariancia / np.outer(desvios, desvios)
+        return pd.DataFrame(correlacao, index=self.colunas, columns=self.colunas)
+
+    def _moda_por_grupo(self, colunas_grupo: List[str], coluna: str) -> pd.Series:
+        """Moda de uma coluna em cada grupo; em empate vence o valor que aparece primeiro"""
+        # Sem ordenação, os pares (grupo, valor) ficam na ordem da primeira ocorrência,
+        # e a ordenação estável por contagem preserva essa ordem nos empates
+        contagens = self.dados.groupby(colunas_grupo + [coluna], sort=False, observed=True).size()
+        contagens = contagens.sort_values(ascending=False, kind='stable')
+        primeiros = contagens.groupby(level=list(range(len(colunas_grupo))), sort=False).head(1)
+        return pd.Series(primeiros.index.get_level_values(-1), index=primeiros.index.droplevel(-1))
+
+    def analisar_por_grupo(self, colunas_grupo: Optional[List[str]] = None, confianca: float = 0.95,
+                           num_servidores: Union[int, pd.Series] = 1) -> pd.DataFrame:
+        """Estatísticas, intervalos de confiança e métricas M/M/c de todos os grupos de uma vez
+
+        Os grupos (ex.: por médico, especialidade ou dia da semana) vêm de um
+        único groupby com agregações vetorizadas, sem laço sobre os grupos.
+        'tempo_chegada' é o intervalo desde o paciente anterior da clínica, não
+        do mesmo grupo; por isso a taxa de chegada de cada grupo é o número de
+        pacientes dividido pelo período que o grupo ocupa na linha do tempo da
+        clínica (da chegada anterior à sua primeira até a sua última chegada).
+        As métricas M/M/c usam essa taxa, a média de 'tempo_atendimento' do
+        grupo e `num_servidores` (inteiro ou Series indexada pelos grupos),
+        avaliadas em uma só chamada do núcleo de Erlang C. Retorna uma linha
+        por grupo e colunas (coluna, estatística), com as métricas da fila em
+        ('fila', métrica).
+
+        Colunas de agrupamento não informadas no construtor foram tratadas
+        como medidas e filtradas por valores positivos; nesse caso a análise é
+        refeita a partir dos dados originais, com elas como categóricas.
+        """
+        colunas_grupo = list(colunas_grupo or self.colunas_grupo)
+        if not colunas_grupo:
+            raise ValueError("Informe as colunas de agrupamento")
+        novas = [coluna for coluna in colunas_grupo if coluna not in self.colunas_grupo]
+        ausentes = [coluna for coluna in novas if coluna not in self._dados_originais.columns]
+        if ausentes:
+            raise ValueError(f"Colunas de agrupamento inexistentes: {ausentes}")
+        if novas:
+            analisador = AnalisadorEstatistico(self._dados_originais, self.colunas_grupo + novas)
+            return analisador.analisar_por_grupo(colunas_grupo, confianca, num_servidores)
+
+        from scipy import stats
+
+        especificacao = {coluna: ['count', 'mean', 'median', 'var', 'min', 'max'] for coluna in self.colunas}
+        dados = self.dados
+        com_fila = all(coluna in self.colunas for coluna in COLUNAS_TEMPO)
+        if com_fila:
+            # Instantes absolutos na linha do tempo de toda a clínica
+            instantes = dados[COLUNAS_TEMPO[0]].cumsum()
+            dados = dados.assign(_inicio_periodo=instantes - dados[COLUNAS_TEMPO[0]], _fim_periodo=instantes)
+            especificacao.update({'_inicio_periodo': ['min'], '_fim_periodo': ['max']})
+        resumo = dados.groupby(colunas_grupo, sort=True, observed=True).agg(especificacao)
+        n = resumo[(self.colunas[0], 'count')].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_crit = np.where(n > 1, stats.t.ppf((1 + confianca) / 2, np.maximum(n - 1, 1)), np.nan)
+
+        tabela = {}
+        for coluna in self.colunas:
+            media = resumo[(coluna, 'mean')].to_numpy()
+            variancia = resumo[(coluna, 'var')].to_numpy()
+            desvio_padrao = np.sqrt(variancia)
+            margem = t_crit * desvio_padrao / np.sqrt(n)
+            tabela.update({
+                (coluna, 'media'): media,
+                (coluna, 'mediana'): resumo[(coluna, 'median')].to_numpy(),
+                (coluna, 'moda'): self._moda_por_grupo(colunas_grupo, coluna).reindex(resumo.index).to_numpy(),
+                (coluna, 'variancia'): variancia,
+                (coluna, 'desvio_padrao'): desvio_padrao,
+                (coluna, 'min'): resumo[(coluna, 'min')].to_numpy(),
+                (coluna, 'max'): resumo[(coluna, 'max')].to_numpy(),
+                (coluna, 'amplitude'): (resumo[(coluna, 'max')] - resumo[(coluna, 'min')]).to_numpy(),
+                (coluna, 'coef_variacao'): desvio_padrao / media * 100,  # CV em percentual
+                (coluna, 'ic_inferior'): media - margem,
+                (coluna, 'ic_superior'): media + margem
+            })
+
+        tabela[('fila', 'num_pacientes')] = n.astype(np.int64)
+        if com_fila:
+            if isinstance(num_servidores, pd.Series):
+                servidores = num_servidores.reindex(resumo.index).fillna(1).to_numpy(dtype=np.int64)
+            else:
+                servidores = np.full(len(resumo), int(num_servidores))
+            periodo = (resumo[('_fim_periodo', 'max')] - resumo[('_inicio_periodo', 'min')]).to_numpy()
+            metricas = calcular_metricas_mmc(n / periodo,
+                                             1 / tabela[(COLUNAS_TEMPO[1], 'media')], servidores)
+            tabela[('fila', 'num_servidores')] = np.maximum(servidores, 1)
+            tabela.update({('fila', chave): valores for chave, valores in metricas.items()})
+
+        return pd.DataFrame(tabela, index=resumo.index)
@@ -0,0 +1,52 @@
+import pandas as pd
+import numpy as np
+from typing import Optional
+from carregamento import COLUNAS_TEMPO
+
+# Distribuições disponíveis para os tempos entre chegadas
+DISTRIBUICOES = ['exponencial', 'lognormal', 'rajadas']
+
+
+def _lognormal(rng: np.random.Generator, media: float, cv: float, tamanho: int) -> np.ndarray:
+    """Amostra uma lognormal parametrizada pela média e coeficiente de variação"""
+    sigma2 = np.log1p(cv ** 2)
+    return rng.lognormal(np.log(media) - sigma2 / 2, np.sqrt(sigma2), tamanho)
+
+
+def gerar_dados_sinteticos(num_pacientes: int, distribuicao: str = 'exponencial',
+                           media_chegada: float = 5.0, media_atendimento: float = 12.0,
+                           cv: float = 1.0, fator_rajada: float = 4.0, duracao_rajada: float = 50.0,
+                           semente: Optional[int] = None) -> pd.DataFrame:
+    """Gera tempos de chegada e atendimento sintéticos e reprodutíveis
+
+    - 'exponencial': chegadas e atendimentos exponenciais (M/M/c);
+    - 'lognormal': ambos lognormais com coeficiente de variação `cv`;
+    - 'rajadas': chegadas alternam entre períodos de pico e calmos, com
+      duração média de `duracao_rajada` pacientes, e no pico a taxa é
+      `fator_rajada` vezes a do período calmo. A média global é preservada.
+
+    Os tempos de atendimento são exponenciais, exceto em 'lognormal'.
+    """
+    if distribuicao not in DISTRIBUICOES:
+        raise ValueError(f"A distribuição deve ser uma de {DISTRIBUICOES}")
+    rng = np.random.default_rng(semente)
+
+    if distribuicao == 'lognormal':
+        chegadas = _lognormal(rng, media_chegada, cv, num_pacientes)
+        atendimentos = _lognormal(rng, media_atendimento, cv, num_pacientes)
+    else:
+        if distribuicao == 'exponencial':
+            chegadas = rng.exponential(media_chegada, num_pacientes)
+        else:
+            # Períodos com duração geométrica, alternando pico e calma
+            num_periodos = int(num_pacientes / duracao_rajada) * 2 + 2
+            duracoes = rng.geometric(1 / duracao_rajada, num_periodos)
+            while duracoes.sum() < num_pacientes:
+                duracoes = np.concatenate([duracoes, rng.geometric(1 / duracao_rajada, num_periodos)])
+            pico = np.repeat(np.arange(len(duracoes)) % 2 == 0, duracoes)[:num_pacientes]
+            media_pico = 2 * media_chegada / (1 + fator_rajada)
+            chegadas = rng.exponential(1.0, num_pacientes) * np.where(pico, media_pico,
+                                                                      fator_rajada * media_pico)
+        atendimentos = rng.exponential(media_atendimento, num_pacientes)
+
+    return pd.DataFrame({COLUNAS_TEMPO[0]: chegadas, COLUNAS_TEMPO[1]: atendimentos})
@@ -0,0 +1,197 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from typing import Callable, Dict, Hashable, Tuple
+import io
+from cache import cache_figuras
+
+# Pontos desenhados por série: cerca de dois por pixel de uma figura de 8 polegadas a 100 dpi
+ORCAMENTO_PONTOS = 1600
+# Valores atípicos desenhados em cada extremo do boxplot
+MAX_ATIPICOS = 100
+
+
+def resumo_histograma(valores: np.ndarray, num_faixas: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """Contagens e bordas do histograma, calculadas uma vez com NumPy"""
+    return np.histogram(np.asarray(valores, dtype=float), bins=num_faixas)
+
+
+def resumo_boxplot(valores: np.ndarray, rotulo: str = '', whis: float = 1.5,
+                   max_atipicos: int = MAX_ATIPICOS) -> Dict[str, object]:
+    """Quartis, bigodes e atípicos no formato de `Axes.bxp`
+
+    Os bigodes seguem a regra de `boxplot` (até `whis` x IQR além dos
+    quartis). Dos atípicos, são mantidos no máximo `max_atipicos` por extremo,
+    escolhidos por quantis, o que preserva o alcance e a forma da cauda sem
+    desenhar milhares de marcadores.
+    """
+    valores = np.asarray(valores, dtype=float)
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    iqr = q3 - q1
+    dentro = valores[(valores >= q1 - whis * iqr) & (valores <= q3 + whis * iqr)]
+    bigode_inferior, bigode_superior = (dentro.min(), dentro.max()) if len(dentro) else (q1, q3)
+
+    atipicos = []
+    for extremo in (valores[valores < bigode_inferior], valores[valores > bigode_superior]):
+        if len(extremo) > max_atipicos:
+            extremo = np.quantile(extremo, np.linspace(0, 1, max_atipicos))
+        atipicos.append(extremo)
+    return {
+        'label': rotulo,
+        'med': mediana,
+        'q1': q1,
+        'q3': q3,
+        'whislo': bigode_inferior,
+        'whishi': bigode_superior,
+        'fliers': np.concatenate(atipicos)
+    }
+
+
+def _primeiro_indice(mascara: np.ndarray, inicios: np.ndarray) -> np.ndarray:
+    """Índice do primeiro True de cada segmento que começa em `inicios`"""
+    candidatos = np.where(mascara, np.arange(len(mascara)), len(mascara))
+    return np.minimum.reduceat(candidatos, inicios)
+
+
+def reduzir_minmax(x: np.ndarray, y: np.ndarray, num_faixas: int = ORCAMENTO_PONTOS // 2) -> Tuple[np.ndarray, np.ndarray]:
+    """Decimação mín/máx: mantém o menor e o maior y de cada faixa de x
+
+    Com `x` crescente, as faixas têm largura uniforme em x (uma por pixel),
+    então picos e vales continuam visíveis. Tudo é vetorizado com reduceat.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= 2 * num_faixas:
+        return x, y
+    if x[-1] > x[0]:
+        faixa = np.minimum(((x - x[0]) / (x[-1] - x[0]) * num_faixas).astype(np.int64), num_faixas - 1)
+    else:
+        faixa = np.arange(n) * num_faixas // n
+    inicios = np.flatnonzero(np.r_[True, faixa[1:] != faixa[:-1]])
+    tamanhos = np.diff(np.r_[inicios, n])
+    minimos = np.repeat(np.minimum.reduceat(y, inicios), tamanhos)
+    maximos = np.repeat(np.maximum.reduceat(y, inicios), tamanhos)
+    indices = np.unique(np.r_[0, n - 1, _primeiro_indice(y == minimos, inicios),
+                              _primeiro_indice(y == maximos, inicios)])
+    return x[indices], y[indices]
+
+
+def reduzir_lttb(x: np.ndarray, y: np.ndarray, num_pontos: int = ORCAMENTO_PONTOS) -> Tuple[np.ndarray, np.ndarray]:
+    """Largest-Triangle-Three-Buckets: escolhe `num_pontos` que preservam a forma da série
+
+    Em cada faixa fica o ponto que forma o maior triângulo com o ponto já
+    escolhido na faixa anterior e a média da faixa seguinte. O laço é sobre
+    as faixas (da ordem do número de pixels), não sobre os pontos.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if num_pontos >= n or num_pontos < 3:
+        return x, y
+
+    limites = np.linspace(1, n - 1, num_pontos - 1).astype(np.int64)
+    selecionados = np.empty(num_pontos, dtype=np.int64)
+    selecionados[0], selecionados[-1] = 0, n - 1
+    anterior = 0
+    for i in range(num_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        fim_seguinte = limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[fim:fim_seguinte].mean()
+        media_y = y[fim:fim_seguinte].mean()
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        selecionados[i + 1] = anterior
+    return x[selecionados], y[selecionados]
+
+
+def renderizar(chave: Hashable, construir_figura: Callable[[], plt.Figure]) -> bytes:
+    """Renderiza a figura em PNG uma única vez por chave e libera a figura"""
+    def gerar():
+        fig = construir_figura()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight')
+        plt.close(fig)
+        return buffer.getvalue()
+    return cache_figuras.obter_ou_calcular(chave, gerar)
+
+
+def figura_histogramas(tempos_chegada: np.ndarray, tempos_atendimento: np.ndarray,
+                       num_faixas: int = 20) -> plt.Figure:
+    """Histogramas dos tempos entre chegadas e de atendimento a partir das contagens"""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
+    for ax, valores, cor, titulo, rotulo in [
+        (ax1, tempos_chegada, 'skyblue', 'Distribuição dos Tempos de Chegada', 'Tempo entre Chegadas (min)'),
+        (ax2, tempos_atendimento, 'lightcoral', 'Distribuição dos Tempos de Atendimento', 'Tempo de Atendimento (min)')
+    ]:
+        contagens, bordas = resumo_histograma(valores, num_faixas)
+        # Uma barra por faixa, com as contagens como pesos
+        ax.hist(bordas[:-1], bordas, weights=contagens, color=cor, edgecolor='black')
+        ax.set_title(titulo)
+        ax.set_xlabel(rotulo)
+        ax.set_ylabel('Frequência')
+    return fig
+
+
+def figura_boxplot(tempos_chegada: np.ndarray, tempos_atendimento: np.ndarray) -> plt.Figure:
+    """Boxplots desenhados a partir dos resumos, sem passar os dados brutos ao Matplotlib"""
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.bxp([resumo_boxplot(tempos_chegada, 'tempo_chegada'),
+            resumo_boxplot(tempos_atendimento, 'tempo_atendimento')], patch_artist=True)
+    ax.grid(True, alpha=0.3)
+    ax.set_title('Comparação dos Tempos de Chegada e Atendimento')
+    ax.set_ylabel('Tempo (min)')
+    return fig
+
+
+def resumir_simulacao(traco: Dict[str, np.ndarray], linha_tempo: dict) -> dict:
+    """Resumo compacto da simulação para os gráficos e a comparação com o M/M/c
+
+    Guarda apenas as métricas escalares e as séries já reduzidas ao
+    orçamento de pontos, de modo que o resumo pode ficar em cache sem manter
+    o traço por paciente (dezenas de MB por milhão de pacientes).
+    """
+    tempo_espera = traco['espera']
+    clientes, esperas = reduzir_lttb(np.arange(1, len(tempo_espera) + 1), tempo_espera)
+    tempos, fila = reduzir_minmax(linha_tempo['tempos'], linha_tempo['fila'])
+    return {
+        'num_pacientes': len(tempo_espera),
+        'cliente': clientes,
+        'espera': esperas,
+        'tempos': tempos,
+        'fila': fila,
+        'ocupacao_servidores': np.asarray(linha_tempo['ocupacao_servidores']),
+        'Lq': float(linha_tempo['Lq']),
+        'utilizacao': float(linha_tempo['utilizacao'])
+    }
+
+
+def figura_espera(resumo: dict) -> plt.Figure:
+    """Tempo de espera por cliente, a partir da série reduzida por LTTB"""
+    fig, ax = plt.subplots(figsize=(8, 4))
+    # Marcadores apenas quando a série é curta o bastante para distingui-los
+    marcador = 'o' if resumo['num_pacientes'] <= 200 else None
+    ax.plot(resumo['cliente'], resumo['espera'], marker=marcador, linestyle='-', color='purple')
+    ax.set_title('Tempo de Espera por Cliente')
+    ax.set_xlabel('Cliente')
+    ax.set_ylabel('Tempo de Espera (min)')
+    return fig
+
+
+def figura_fila(resumo: dict) -> plt.Figure:
+    """Tamanho da fila ao longo do tempo, a partir da série com decimação mín/máx"""
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.step(resumo['tempos'], resumo['fila'], where='post', color='orange')
+    ax.set_title('Tamanho da Fila ao Longo do Tempo')
+    ax.set_xlabel('Tempo (min)')
+    ax.set_ylabel('Tamanho da Fila')
+    return fig
+
+
+def figura_ocupacao(resumo: dict, num_servidores: int) -> plt.Figure:
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.bar(range(1, num_servidores + 1), resumo['ocupacao_servidores'], color='teal')
+    ax.set_title('Tempo de Ocupação dos Servidores')
+    ax.set_xlabel('Servidor')
+    ax.set_ylabel('Tempo Ocupado (min)')
+    return fig
@@ -0,0 +1,231 @@
+"""Execução em lote, sem interface gráfica
+
+Exemplos:
+    python src/lote.py data/input.csv --servidores 1-10 --saida metricas.csv --estatisticas estatisticas.csv
+    python src/lote.py data/ --servidores 1-5 --saida resumo.csv --processos 8 --simular
+    python src/lote.py "clinicas/*/2024-*.csv" --saida resumo.parquet
+
+Com vários arquivos, um diretório ou um padrão glob, cada arquivo é
+analisado em um processo e os resultados são reunidos em uma única tabela.
+
+Apenas NumPy e pandas são importados na inicialização; SciPy só é carregado
+quando os intervalos de confiança são calculados e Matplotlib nunca é usado.
+"""
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from carregamento import COLUNAS_TEMPO, carregar_dataset, carregar_em_blocos
+from estatistica import AnalisadorEstatistico
+from simulacao import METRICAS_REPLICACAO, calcular_metricas_mmc, metricas_traco, simular_fila
+
+# Ordem das estatísticas e métricas nos vetores devolvidos por `analisar_arquivo`
+ESTATISTICAS_LOTE = ['media', 'mediana', 'moda', 'variancia', 'desvio_padrao', 'min', 'max',
+                     'amplitude', 'coef_variacao', 'ic_inferior', 'ic_superior']
+METRICAS_LOTE = ['P0', 'P_espera', 'Lq', 'Wq', 'W', 'L', 'utilizacao', 'lambda', 'mu', 'rho']
+
+
+def interpretar_servidores(texto: str) -> List[int]:
+    """Converte uma grade como '1-5,8,10' na lista ordenada de servidores"""
+    servidores = set()
+    for parte in texto.split(','):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if '-' in parte:
+            inicio, fim = (int(valor) for valor in parte.split('-', 1))
+            servidores.update(range(inicio, fim + 1))
+        else:
+            servidores.add(int(parte))
+    if not servidores or min(servidores) < 1:
+        raise argparse.ArgumentTypeError("A grade de servidores deve conter inteiros positivos")
+    return sorted(servidores)
+
+
+def calcular_metricas_grade(matriz: np.ndarray, servidores: List[int]) -> pd.DataFrame:
+    """Calcula as métricas M/M/c para toda a grade de servidores em uma chamada"""
+    medias = matriz.mean(axis=0)
+    metricas = calcular_metricas_mmc(1 / medias[0], 1 / medias[1], np.asarray(servidores))
+    tabela = pd.DataFrame(metricas)
+    tabela.insert(0, 'num_servidores', servidores)
+    return tabela
+
+
+def calcular_tabela_estatisticas(matriz: np.ndarray, confianca: float) -> pd.DataFrame:
+    """Estatísticas descritivas com o intervalo de confiança de cada coluna"""
+    analisador = AnalisadorEstatistico.de_matriz(matriz)
+    estatisticas = analisador.calcular_estatisticas_descritivas()
+    for coluna in COLUNAS_TEMPO:
+        ic = analisador.calcular_intervalo_confianca(coluna, confianca)
+        estatisticas[coluna]['ic_inferior'], estatisticas[coluna]['ic_superior'] = ic
+    tabela = pd.DataFrame(estatisticas).reset_index()
+    return tabela.rename(columns={'index': 'Estatística'})
+
+
+def listar_arquivos(entradas: List[str]) -> List[str]:
+    """Expande diretórios (todos os .csv) e padrões glob em uma lista ordenada de arquivos"""
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos.extend(glob.glob(os.path.join(entrada, '*.csv')))
+        elif glob.has_magic(entrada):
+            arquivos.extend(glob.glob(entrada, recursive=True))
+        else:
+            arquivos.append(entrada)
+    return sorted(set(arquivos))
+
+
+def tamanho_vetor(num_servidores: int, simular: bool) -> int:
+    """Número de valores que `analisar_arquivo` devolve por arquivo"""
+    tamanho = 1 + len(COLUNAS_TEMPO) * len(ESTATISTICAS_LOTE) + num_servidores * len(METRICAS_LOTE)
+    return tamanho + (num_servidores * len(METRICAS_REPLICACAO) if simular else 0)
+
+
+def analisar_arquivo(caminho: str, servidores: List[int], confianca: float = 0.95,
+                     simular: bool = False) -> Tuple[np.ndarray, str]:
+    """Carrega um arquivo e calcula estatísticas, métricas M/M/c e, opcionalmente, a simulação
+
+    Executado nos processos do lote: em vez de DataFrames, devolve um único
+    vetor float64 com o número de pacientes, as estatísticas de cada coluna,
+    as métricas M/M/c de cada número de servidores e, com `simular=True`, as
+    métricas observadas na simulação por eventos do traço (METRICAS_REPLICACAO),
+    além da mensagem de erro ('' se não houve). Em caso de erro o vetor é NaN.
+    """
+    vetor = np.full(tamanho_vetor(len(servidores), simular), np.nan)
+    try:
+        matriz, _ = carregar_em_blocos(caminho)
+        if len(matriz) == 0:
+            raise ValueError("Não há dados válidos após a filtragem")
+
+        estatisticas = calcular_tabela_estatisticas(matriz, confianca).set_index('Estatística')
+        metricas = calcular_metricas_grade(matriz, servidores)
+        partes = [[len(matriz)],
+                  estatisticas.loc[ESTATISTICAS_LOTE, COLUNAS_TEMPO].to_numpy().T.ravel(),
+                  metricas[METRICAS_LOTE].to_numpy().ravel()]
+        if simular:
+            chegadas = np.cumsum(matriz[:, 0])
+            partes.append(np.concatenate([metricas_traco(simular_fila(chegadas, matriz[:, 1], c), c)
+                                          for c in servidores]))
+        vetor[:] = np.concatenate(partes)
+        return vetor, ''
+    except Exception as e:
+        return vetor, str(e)
+
+
+def analisar_lote(arquivos: List[str], servidores: List[int], confianca: float = 0.95,
+                  simular: bool = False, num_processos: Optional[int] = None) -> pd.DataFrame:
+    """Analisa muitos arquivos em paralelo e reúne os resultados em uma tabela
+
+    Cada arquivo é processado de forma independente por `analisar_arquivo`
+    em um pool de `num_processos` processos, e apenas vetores compactos
+    voltam ao processo principal, que os empilha em uma matriz. Retorna uma
+    linha por (arquivo, num_servidores) com o número de pacientes, as
+    estatísticas de cada coluna ('<coluna>_<estatistica>'), as métricas M/M/c,
+    as métricas simuladas ('<metrica>_simulado') e a mensagem de erro.
+    """
+    servidores = list(servidores)
+    num_processos = max(1, min(num_processos or os.cpu_count() or 1, len(arquivos) or 1))
+    tarefa = partial(analisar_arquivo, servidores=servidores, confianca=confianca, simular=simular)
+    if num_processos == 1:
+        resultados = [tarefa(arquivo) for arquivo in arquivos]
+    else:
+        with ProcessPoolExecutor(max_workers=num_processos) as executor:
+            # Vários arquivos por envio para diluir a comunicação entre processos
+            lote = max(1, len(arquivos) // (4 * num_processos))
+            resultados = list(executor.map(tarefa, arquivos, chunksize=lote))
+
+    k = len(servidores)
+    valores = np.vstack([vetor for vetor, _ in resultados]) if resultados else np.empty((0, tamanho_vetor(k, simular)))
+    num_estatisticas = len(COLUNAS_TEMPO) * len(ESTATISTICAS_LOTE)
+    fim_metricas = 1 + num_estatisticas + k * len(METRICAS_LOTE)
+
+    # Uma linha por arquivo e número de servidores: as colunas por arquivo são repetidas
+    tabela = pd.DataFrame({
+        'arquivo': np.repeat(arquivos, k),
+        'num_servidores': np.tile(servidores, len(arquivos)),
+        'num_pacientes': pd.Series(np.repeat(valores[:, 0], k)).astype('Int64')  # Nulo nos arquivos com erro
+    })
+    nomes = [f'{coluna}_{estatistica}' for coluna in COLUNAS_TEMPO for estatistica in ESTATISTICAS_LOTE]
+    tabela[nomes] = np.repeat(valores[:, 1:1 + num_estatisticas], k, axis=0)
+    tabela[METRICAS_LOTE] = valores[:, 1 + num_estatisticas:fim_metricas].reshape(-1, len(METRICAS_LOTE))
+    if simular:
+        tabela[[f'{metrica}_simulado' for metrica in METRICAS_REPLICACAO]] = (
+            valores[:, fim_metricas:].reshape(-1, len(METRICAS_REPLICACAO)))
+    tabela['erro'] = np.repeat([erro for _, erro in resultados], k)
+    return tabela
+
+
+def salvar_tabela(tabela: pd.DataFrame, caminho: str):
+    """Salva em Parquet ou em CSV no mesmo formato das exportações da interface"""
+    if caminho.lower().endswith('.parquet'):
+        tabela.to_parquet(caminho, index=False)
+    else:
+        tabela.to_csv(caminho, index=False, sep=';', decimal=',')
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Simulação de filas da clínica em lote")
+    parser.add_argument('dados', nargs='+',
+                        help="Arquivo CSV com as colunas tempo_chegada e tempo_atendimento, "
+                             "ou vários arquivos, diretórios e padrões glob para o modo em lote")
+    parser.add_argument('--servidores', type=interpretar_servidores, default=interpretar_servidores('1-10'),
+                        help="Grade de números de servidores, ex.: '1-10' ou '2,4,8' (padrão: 1-10)")
+    parser.add_argument('--saida', default='metricas.csv',
+                        help="Arquivo de saída das métricas (.csv ou .parquet)")
+    parser.add_argument('--estatisticas', default=None,
+                        help="Arquivo de saída das estatísticas descritivas (.csv ou .parquet)")
+    parser.add_argument('--confianca', type=float, default=0.95,
+                        help="Nível de confiança dos intervalos (padrão: 0.95)")
+    parser.add_argument('--sem-cache', action='store_true',
+                        help="Lê o CSV em blocos sem gravar o cache binário colunar")
+    parser.add_argument('--processos', type=int, default=None,
+                        help="Processos do modo em lote (padrão: número de CPUs)")
+    parser.add_argument('--simular', action='store_true',
+                        help="No modo em lote, inclui a simulação por eventos de cada arquivo")
+    return parser
+
+
+def executar_lote(args: argparse.Namespace) -> int:
+    """Modo em lote: uma tabela-resumo para todos os arquivos"""
+    arquivos = listar_arquivos(args.dados)
+    if not arquivos:
+        print("Nenhum arquivo CSV encontrado", file=sys.stderr)
+        return 1
+    tabela = analisar_lote(arquivos, args.servidores, args.confianca, args.simular, args.processos)
+    salvar_tabela(tabela, args.saida)
+    falhas = tabela.loc[tabela['erro'] != '', ['arquivo', 'erro']].drop_duplicates()
+    for arquivo, erro in falhas.itertuples(index=False):
+        print(f"Erro em {arquivo}: {erro}", file=sys.stderr)
+    return 1 if len(falhas) == len(arquivos) else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = criar_parser().parse_args(argv)
+    if len(args.dados) > 1 or os.path.isdir(args.dados[0]) or glob.has_magic(args.dados[0]):
+        return executar_lote(args)
+    try:
+        if args.sem_cache:
+            matriz, _ = carregar_em_blocos(args.dados[0])
+        else:
+            matriz = carregar_dataset(args.dados[0])
+        if len(matriz) == 0:
+            raise ValueError("Não há dados válidos após a filtragem")
+
+        salvar_tabela(calcular_metricas_grade(matriz, args.servidores), args.saida)
+        if args.estatisticas:
+            salvar_tabela(calcular_tabela_estatisticas(matriz, args.confianca), args.estatisticas)
+    except Exception as e:
+        print(f"Erro na execução em lote: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+import math
+import socket
+import time
+from carregamento import COLUNAS_TEMPO, AcumuladorMomentos, filtrar_bloco
+from simulacao import calcular_metricas_mmc
+
+
+class QuantilP2:
+    """Estimativa de um quantil em O(1) por valor pelo algoritmo P² (Jain e Chlamtac)
+
+    Mantém apenas cinco marcadores, sem armazenar as observações.
+    """
+
+    def __init__(self, p: float = 0.5):
+        self.p = p
+        self.alturas = []
+        self.posicoes = [1, 2, 3, 4, 5]
+        self.desejadas = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.incrementos = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def adicionar(self, x: float):
+        q = self.alturas
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Célula em que x cai, ajustando os extremos se necessário
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self.posicoes
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desejadas[i] += self.incrementos[i]
+
+        # Ajusta os marcadores internos por interpolação parabólica (ou linear)
+        for i in range(1, 4):
+            d = self.desejadas[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolica = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if q[i - 1] < parabolica < q[i + 1]:
+                    q[i] = parabolica
+                else:
+                    q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    @property
+    def valor(self) -> float:
+        q = self.alturas
+        if not q:
+            return float('nan')
+        if len(q) < 5:
+            # Poucas observações: quantil exato dos valores armazenados
+            return float(np.quantile(q, self.p))
+        return q[2]
+
+
+class ModaAproximada:
+    """Moda em O(1) por valor, contando valores arredondados a `resolucao`
+
+    As mesmas contagens dão quantis aproximados (erro de até meia
+    resolução), com memória proporcional à amplitude dos dados, não ao
+    número de valores.
+    """
+
+    def __init__(self, resolucao: float = 0.1):
+        self.resolucao = resolucao
+        self.contagens = {}
+        self.moda = float('nan')
+        self._maior_contagem = 0
+
+    def adicionar(self, x: float, vezes: int = 1):
+        chave = round(x / self.resolucao)
+        contagem = self.contagens.get(chave, 0) + vezes
+        self.contagens[chave] = contagem
+        # As contagens só crescem, então basta comparar com a maior atual
+        if contagem > self._maior_contagem:
+            self._maior_contagem = contagem
+            self.moda = chave * self.resolucao
+
+    def adicionar_bloco(self, valores: np.ndarray):
+        """Conta um bloco de valores de uma vez, agrupando-os por faixa com NumPy"""
+        faixas, contagens = np.unique(np.round(np.asarray(valores, dtype=float) / self.resolucao),
+                                      return_counts=True)
+        for faixa, contagem in zip(faixas.tolist(), contagens.tolist()):
+            self.adicionar(faixa * self.resolucao, contagem)
+
+    def quantil(self, p: float) -> float:
+        """Quantil aproximado pelas contagens por faixa"""
+        if not self.contagens:
+            return float('nan')
+        chaves = np.array(sorted(self.contagens))
+        acumuladas = np.cumsum([self.contagens[chave] for chave in chaves.tolist()])
+        posicao = np.searchsorted(acumuladas, p * acumuladas[-1])
+        return float(chaves[min(posicao, len(chaves) - 1)] * self.resolucao)
+
+
+class MonitorFilaOnline:
+    """Estatísticas e métricas M/M/c atualizadas registro a registro
+
+    Cada registro custa O(1): média e variância por Welford, mínimo e máximo
+    diretos, mediana pelo algoritmo P² e moda por contagem em faixas de
+    `resolucao_moda`. As métricas da fila usam as taxas correntes e não
+    dependem do número de registros já recebidos.
+    """
+
+    def __init__(self, num_servidores: int, resolucao_moda: float = 0.1):
+        self.num_servidores = max(1, num_servidores)
+        self.colunas = list(COLUNAS_TEMPO)
+        self.momentos = AcumuladorMomentos(len(self.colunas))
+        self.medianas = [QuantilP2(0.5) for _ in self.colunas]
+        self.modas = [ModaAproximada(resolucao_moda) for _ in self.colunas]
+        self.descartados = 0
+
+    def adicionar(self, registro: Union[Dict[str, float], Sequence[float]]) -> bool:
+        """Adiciona um registro (dicionário com as colunas ou sequência na ordem delas)
+
+        Registros nulos ou com tempos não positivos são descartados.
+        """
+        try:
+            if isinstance(registro, dict):
+                valores = [float(registro[coluna]) for coluna in self.colunas]
+            else:
+                valores = [float(valor) for valor in registro[:len(self.colunas)]]
+        except (KeyError, TypeError, ValueError):
+            self.descartados += 1
+            return False
+        if len(valores) < len(self.colunas) or not all(valor > 0 for valor in valores):
+            self.descartados += 1
+            return False
+
+        self.momentos.adicionar(np.array(valores))
+        for j, valor in enumerate(valores):
+            self.medianas[j].adicionar(valor)
+            self.modas[j].adicionar(valor)
+        return True
+
+    def adicionar_lote(self, dados: Union[pd.DataFrame, np.ndarray]) -> int:
+        """Adiciona vários registros de uma vez e retorna quantos foram aceitos"""
+        if isinstance(dados, pd.DataFrame):
+            matriz = filtrar_bloco(dados, self.colunas)
+            total = len(dados)
+        else:
+            matriz = np.asarray(dados, dtype=float).reshape(-1, len(self.colunas))
+            total = len(matriz)
+            matriz = matriz[(matriz > 0).all(axis=1)]
+        self.descartados += total - len(matriz)
+
+        self.momentos.atualizar(matriz)
+        for j in range(len(self.colunas)):
+            for valor in matriz[:, j].tolist():
+                self.medianas[j].adicionar(valor)
+            self.modas[j].adicionar_bloco(matriz[:, j])
+        return len(matriz)
+
+    def consumir(self, registros: Iterable, limite: Optional[int] = None) -> int:
+        """Adiciona registros de uma fonte (ex.: `acompanhar_arquivo`) até `limite`"""
+        aceitos = 0
+        for i, registro in enumerate(registros):
+            if limite is not None and i >= limite:
+                break
+            aceitos += self.adicionar(registro)
+        return aceitos
+
+    @property
+    def num_registros(self) -> int:
+        return self.momentos.n
+
+    def estatisticas(self) -> dict:
+        """Estatísticas correntes, no mesmo formato de `calcular_estatisticas_descritivas`"""
+        variancias = self.momentos.variancia
+        estatisticas = {}
+        for j, coluna in enumerate(self.colunas):
+            if self.momentos.n == 0:
+                estatisticas[coluna] = {stat: float('nan') for stat in [
+                    'media', 'mediana', 'moda', 'variancia', 'desvio_padrao',
+                    'min', 'max', 'amplitude', 'coef_variacao']}
+                continue
+            media = float(self.momentos.media[j])
+            desvio_padrao = math.sqrt(variancias[j]) if self.momentos.n > 1 else float('nan')
+            estatisticas[coluna] = {
+                'media': media,
+                'mediana': self.medianas[j].valor,
+                'moda': self.modas[j].moda,
+                'variancia': float(variancias[j]),
+                'desvio_padrao': desvio_padrao,
+                'min': float(self.momentos.min[j]),
+                'max': float(self.momentos.max[j]),
+                'amplitude': float(self.momentos.max[j] - self.momentos.min[j]),
+                'coef_variacao': (desvio_padrao / media) * 100 if media > 0 else float('nan')
+            }
+        return estatisticas
+
+    def metricas(self) -> dict:
+        """Métricas M/M/c com λ e μ estimados pelas médias correntes"""
+        if self.momentos.n == 0:
+            return {chave: float('nan') for chave in
+                    ['P0', 'P_espera', 'Lq', 'Wq', 'W', 'L', 'utilizacao', 'lambda', 'mu', 'rho']}
+        metricas = calcular_metricas_mmc(1 / self.momentos.media[0], 1 / self.momentos.media[1],
+                                         self.num_servidores)
+        return {chave: float(valor) for chave, valor in metricas.items()}
+
+
+def _interpretar_linha(linha: str, indices: List[int]) -> Optional[List[float]]:
+    """Extrai as colunas de tempo de uma linha CSV; None se estiver malformada"""
+    campos = linha.strip().split(',')
+    try:
+        return [float(campos[i]) for i in indices]
+    except (IndexError, ValueError):
+        return None
+
+
+def acompanhar_arquivo(caminho: str, intervalo: float = 0.5, do_inicio: bool = True,
+                       parar_no_fim: bool = False) -> Iterator[List[float]]:
+    """Lê continuamente um CSV que está sendo escrito, como `tail -f`
+
+    Gera um registro [tempo_chegada, tempo_atendimento] por linha completa.
+    Com `do_inicio=False` ignora as linhas já existentes; com
+    `parar_no_fim=True` termina ao alcançar o fim atual do arquivo.
+    """
+    with open(caminho, 'r') as arquivo:
+        cabecalho = arquivo.readline().strip().split(',')
+        indices = [cabecalho.index(coluna) for coluna in COLUNAS_TEMPO]
+        if not do_inicio:
+            arquivo.seek(0, 2)
+        pendente = ''
+        while True:
+            linha = arquivo.readline()
+            if not linha:
+                if parar_no_fim:
+                    # A última linha pode não terminar com quebra de linha
+                    registro = _interpretar_linha(pendente, indices) if pendente else None
+                    if registro is not None:
+                        yield registro
+                    return
+                time.sleep(intervalo)
+                continue
+            pendente += linha
+            if not pendente.endswith('\n'):
+                continue  # Linha ainda incompleta
+            registro = _interpretar_linha(pendente, indices)
+            pendente = ''
+            if registro is not None:
+                yield registro
+
+
+def ler_socket(host: str, porta: int, tamanho_leitura: int = 65536) -> Iterator[List[float]]:
+    """Recebe registros por TCP, uma linha 'tempo_chegada,tempo_atendimento' por paciente"""
+    indices = list(range(len(COLUNAS_TEMPO)))
+    with socket.create_connection((host, porta)) as conexao:
+        pendente = b''
+        while True:
+            dados = conexao.recv(tamanho_leitura)
+            if not dados:
+                return
+            pendente += dados
+            *linhas, pendente = pendente.split(b'\n')
+            for linha in linhas:
+                registro = _interpretar_linha(linha.decode(), indices)
+                if registro is not None:
+                    yield registro
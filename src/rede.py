@@ -0,0 +1,190 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+from bisect import bisect_right
+from collections import deque
+import heapq
+from simulacao import calcular_metricas_mmc
+
+# Tipos de evento da simulação da rede
+_CHEGADA = 0
+_SAIDA = 1
+
+
+class _Amostrador:
+    """Entrega valores aleatórios um a um a partir de lotes gerados com NumPy"""
+
+    def __init__(self, gerar, tamanho_lote: int = 65536):
+        self.gerar = gerar
+        self.tamanho_lote = tamanho_lote
+        self.valores = []
+        self.posicao = 0
+
+    def proximo(self) -> float:
+        if self.posicao >= len(self.valores):
+            self.valores = self.gerar(self.tamanho_lote).tolist()
+            self.posicao = 0
+        valor = self.valores[self.posicao]
+        self.posicao += 1
+        return valor
+
+
+class RedeFilas:
+    """Rede de estações (ex.: triagem → consulta → farmácia) com roteamento probabilístico
+
+    Cada estação i tem `num_servidores[i]` servidores idênticos com taxa de
+    serviço `taxas_servico[i]` e recebe chegadas externas à taxa
+    `chegadas_externas[i]`. Após o atendimento em i, o paciente segue para j
+    com probabilidade `roteamento[i][j]` e deixa a clínica com a probabilidade
+    restante da linha.
+    """
+
+    def __init__(self, nomes: Sequence[str], num_servidores: Sequence[int], taxas_servico: Sequence[float],
+                 chegadas_externas: Sequence[float], roteamento: Sequence[Sequence[float]]):
+        self.nomes = list(nomes)
+        self.num_servidores = np.maximum(np.asarray(num_servidores, dtype=np.int64), 1)
+        self.taxas_servico = np.asarray(taxas_servico, dtype=float)
+        self.chegadas_externas = np.asarray(chegadas_externas, dtype=float)
+        self.roteamento = np.asarray(roteamento, dtype=float)
+
+        k = len(self.nomes)
+        if (self.num_servidores.shape != (k,) or self.taxas_servico.shape != (k,)
+                or self.chegadas_externas.shape != (k,) or self.roteamento.shape != (k, k)):
+            raise ValueError("Os parâmetros devem ter uma entrada por estação e roteamento k x k")
+        if (self.roteamento < 0).any() or (self.roteamento.sum(axis=1) > 1 + 1e-9).any():
+            raise ValueError("Cada linha do roteamento deve ter probabilidades não negativas com soma <= 1")
+
+    def taxas_efetivas(self) -> np.ndarray:
+        """Resolve as equações de tráfego λ = λ0 + Pᵀλ"""
+        k = len(self.nomes)
+        return np.linalg.solve(np.eye(k) - self.roteamento.T, self.chegadas_externas)
+
+    def analisar(self) -> Tuple[pd.DataFrame, dict]:
+        """Métricas analíticas da rede de Jackson
+
+        Cada estação é uma fila M/M/c com a taxa efetiva de chegada; todas são
+        avaliadas em uma única chamada do núcleo de Erlang C. As métricas de
+        ponta a ponta somam L das estações e aplicam a lei de Little com a
+        taxa total de chegadas externas.
+        """
+        lambdas = self.taxas_efetivas()
+        metricas = calcular_metricas_mmc(lambdas, self.taxas_servico, self.num_servidores)
+        por_estacao = pd.DataFrame(metricas, index=pd.Index(self.nomes, name='estacao'))
+        por_estacao.insert(0, 'num_servidores', self.num_servidores)
+        por_estacao.insert(1, 'visitas_por_paciente', lambdas / self.chegadas_externas.sum())
+
+        L_total = float(por_estacao['L'].sum())
+        Lq_total = float(por_estacao['Lq'].sum())
+        taxa_total = float(self.chegadas_externas.sum())
+        total = {
+            'L': L_total,
+            'Lq': Lq_total,
+            'W': L_total / taxa_total,
+            'Wq': Lq_total / taxa_total,
+            'lambda': taxa_total
+        }
+        return por_estacao, total
+
+    def simular(self, num_pacientes: int, semente: Optional[int] = None,
+                intervalos_chegada: Optional[np.ndarray] = None,
+                amostras_atendimento: Optional[Dict[int, np.ndarray]] = None) -> Tuple[pd.DataFrame, dict]:
+        """Simulação por eventos de todas as estações em um único laço
+
+        As chegadas externas seguem `intervalos_chegada` (ex.: o traço carregado
+        em um `SimuladorFilas`) ou, se omitidos, um processo de Poisson com a
+        taxa total; a estação de entrada é sorteada proporcionalmente a λ0.
+        Os atendimentos são exponenciais com as taxas de serviço, ou
+        reamostrados de `amostras_atendimento[i]` quando informados. Retorna as
+        métricas observadas por estação e de ponta a ponta.
+        """
+        rng = np.random.default_rng(semente)
+        k = len(self.nomes)
+        taxa_total = self.chegadas_externas.sum()
+
+        if intervalos_chegada is None:
+            intervalos_chegada = rng.exponential(1 / taxa_total, num_pacientes)
+        entradas = np.cumsum(np.asarray(intervalos_chegada, dtype=float)[:num_pacientes])
+        num_pacientes = len(entradas)
+        estacao_inicial = rng.choice(k, num_pacientes, p=self.chegadas_externas / taxa_total)
+
+        amostras_atendimento = amostras_atendimento or {}
+        atendimento = []
+        for i in range(k):
+            if i in amostras_atendimento:
+                amostras = np.asarray(amostras_atendimento[i], dtype=float)
+                gerar = lambda tamanho, amostras=amostras: amostras[rng.integers(0, len(amostras), tamanho)]
+            else:
+                gerar = lambda tamanho, escala=1 / self.taxas_servico[i]: rng.exponential(escala, tamanho)
+            atendimento.append(_Amostrador(gerar))
+        sorteio = _Amostrador(rng.random)
+        acumulado = np.cumsum(self.roteamento, axis=1).tolist()
+
+        livres = self.num_servidores.tolist()
+        filas = [deque() for _ in range(k)]
+        visitas = [0] * k
+        espera = [0.0] * k
+        permanencia = [0.0] * k
+        ocupado = [0.0] * k
+        chegada_estacao = {}
+        saida_final = np.empty(num_pacientes)
+
+        eventos = [(t, p, _CHEGADA, p, e) for p, (t, e) in enumerate(zip(entradas.tolist(), estacao_inicial.tolist()))]
+        heapq.heapify(eventos)
+        sequencia = num_pacientes
+
+        def iniciar(paciente: int, estacao: int, instante: float):
+            nonlocal sequencia
+            duracao = atendimento[estacao].proximo()
+            espera[estacao] += instante - chegada_estacao[paciente]
+            ocupado[estacao] += duracao
+            heapq.heappush(eventos, (instante + duracao, sequencia, _SAIDA, paciente, estacao))
+            sequencia += 1
+
+        instante = 0.0
+        while eventos:
+            instante, _, tipo, paciente, estacao = heapq.heappop(eventos)
+            if tipo == _CHEGADA:
+                visitas[estacao] += 1
+                chegada_estacao[paciente] = instante
+                if livres[estacao] > 0:
+                    livres[estacao] -= 1
+                    iniciar(paciente, estacao, instante)
+                else:
+                    filas[estacao].append(paciente)
+                continue
+
+            # Saída: libera o servidor e roteia o paciente
+            permanencia[estacao] += instante - chegada_estacao[paciente]
+            if filas[estacao]:
+                iniciar(filas[estacao].popleft(), estacao, instante)
+            else:
+                livres[estacao] += 1
+            destino = bisect_right(acumulado[estacao], sorteio.proximo())
+            if destino < k:
+                heapq.heappush(eventos, (instante, sequencia, _CHEGADA, paciente, destino))
+                sequencia += 1
+            else:
+                del chegada_estacao[paciente]
+                saida_final[paciente] = instante
+
+        horizonte = instante
+        visitas = np.array(visitas, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            por_estacao = pd.DataFrame({
+                'num_servidores': self.num_servidores,
+                'visitas': visitas.astype(np.int64),
+                'Wq': np.array(espera) / visitas,
+                'W': np.array(permanencia) / visitas,
+                'Lq': np.array(espera) / horizonte,
+                'L': np.array(permanencia) / horizonte,
+                'utilizacao': np.array(ocupado) / (self.num_servidores * horizonte)
+            }, index=pd.Index(self.nomes, name='estacao'))
+
+        tempo_total = saida_final - entradas
+        total = {
+            'W': float(tempo_total.mean()),
+            'L': float(tempo_total.sum() / horizonte),
+            'Wq': float(sum(espera) / num_pacientes),
+            'pacientes': num_pacientes
+        }
+        return por_estacao, total
@@ -1,41 +1,663 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from typing import List, Tuple, Union, Dict, Optional
+import heapq
 import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from carregamento import (COLUNAS_TEMPO, COLUNA_PRIORIDADE, TAMANHO_BLOCO_PADRAO, carregar_em_blocos,
+                          filtrar_bloco, ler_cabecalho)
+from ajuste import FAMILIAS, ajustar_distribuicoes
+
+
+def simular_fila(tempos_chegada: np.ndarray, tempos_atendimento: np.ndarray,
+                 num_servidores: int) -> Dict[str, np.ndarray]:
+    """Simula a fila FIFO orientada a eventos sobre um traço de pacientes.
+
+    `tempos_chegada` são os instantes absolutos de chegada (já acumulados) e
+    `tempos_atendimento` as durações de atendimento. Os servidores livres são
+    mantidos em um min-heap de (instante_livre, indice), de modo que cada
+    paciente custa O(log c) e os empates ficam com o servidor de menor índice.
+    """
+    chegadas = np.asarray(tempos_chegada, dtype=float)
+    atendimentos = np.asarray(tempos_atendimento, dtype=float)
+    n = len(chegadas)
+    c = max(1, int(num_servidores))
+
+    inicio = np.empty(n)
+    fim = np.empty(n)
+    servidor = np.empty(n, dtype=np.int64)
+
+    # Heap com o instante em que cada servidor fica livre
+    livres = [(0.0, i) for i in range(c)]
+    substituir = heapq.heapreplace
+    for i, (chegada, duracao) in enumerate(zip(chegadas.tolist(), atendimentos.tolist())):
+        livre, idx = livres[0]
+        comeco = chegada if chegada > livre else livre
+        termino = comeco + duracao
+        inicio[i] = comeco
+        fim[i] = termino
+        servidor[i] = idx
+        substituir(livres, (termino, idx))
+
+    return {
+        'chegada': chegadas,
+        'inicio': inicio,
+        'fim': fim,
+        'espera': inicio - chegadas,
+        'servidor': servidor
+    }
+
+
+def _simular_prioridade_nao_preemptiva(chegadas: np.ndarray, atendimentos: np.ndarray,
+                                       prioridades: np.ndarray, c: int) -> tuple:
+    """Sem preempção: a cada servidor liberado, entra o paciente mais urgente já chegado"""
+    n = len(chegadas)
+    inicio = np.empty(n)
+    fim = np.empty(n)
+    servidor = np.empty(n, dtype=np.int64)
+    lista_chegadas = chegadas.tolist()
+    lista_atendimentos = atendimentos.tolist()
+    lista_prioridades = prioridades.tolist()
+
+    livres = [(0.0, i) for i in range(c)]
+    fila = []  # Heap de (prioridade, ordem de chegada)
+    proximo = 0
+    for _ in range(n):
+        livre, idx = livres[0]
+        # Admite na fila todos que chegaram até o servidor ficar livre
+        while proximo < n and lista_chegadas[proximo] <= livre:
+            heapq.heappush(fila, (lista_prioridades[proximo], proximo))
+            proximo += 1
+        instante = livre
+        if not fila:
+            # Ninguém esperando: o servidor aguarda a próxima chegada
+            instante = lista_chegadas[proximo]
+            while proximo < n and lista_chegadas[proximo] <= instante:
+                heapq.heappush(fila, (lista_prioridades[proximo], proximo))
+                proximo += 1
+        _, j = heapq.heappop(fila)
+        # Quem entrou na fila durante a espera de outro servidor pode ter chegado depois de `livre`
+        comeco = max(instante, lista_chegadas[j])
+        inicio[j] = comeco
+        fim[j] = comeco + lista_atendimentos[j]
+        servidor[j] = idx
+        heapq.heapreplace(livres, (fim[j], idx))
+    return inicio, fim, servidor
+
+
+def _simular_prioridade_preemptiva(chegadas: np.ndarray, atendimentos: np.ndarray,
+                                   prioridades: np.ndarray, c: int) -> tuple:
+    """Com preempção (retomada): uma chegada mais urgente interrompe o atendimento menos urgente"""
+    n = len(chegadas)
+    inicio = np.full(n, np.nan)
+    fim = np.empty(n)
+    servidor = np.empty(n, dtype=np.int64)
+    lista_chegadas = chegadas.tolist()
+    lista_prioridades = prioridades.tolist()
+    restante = atendimentos.tolist()
+
+    ociosos = list(range(c))           # Heap de servidores livres (menor índice primeiro)
+    em_atendimento = [None] * c        # Paciente e início do trecho atual, por servidor
+    versao = [0] * c                   # Invalida eventos de término após uma preempção
+    terminos = []                      # Heap de (instante, servidor, versão)
+    atendidos = []                     # Heap de (-prioridade, -ordem, servidor, versão)
+    fila = []                          # Heap de (prioridade, ordem de chegada)
+
+    def iniciar(j: int, s: int, instante: float):
+        if inicio[j] != inicio[j]:  # NaN: primeiro trecho de atendimento
+            inicio[j] = instante
+        em_atendimento[s] = (j, instante)
+        versao[s] += 1
+        heapq.heappush(terminos, (instante + restante[j], s, versao[s]))
+        heapq.heappush(atendidos, (-lista_prioridades[j], -j, s, versao[s]))
+
+    proximo = 0
+    while proximo < n or terminos:
+        # Descarta eventos de término invalidados por preempção
+        while terminos and terminos[0][2] != versao[terminos[0][1]]:
+            heapq.heappop(terminos)
+        if not terminos and proximo >= n:
+            break
+
+        # Em empate, o término é processado antes da chegada
+        if terminos and (proximo >= n or terminos[0][0] <= lista_chegadas[proximo]):
+            instante, s, _ = heapq.heappop(terminos)
+            j, _ = em_atendimento[s]
+            fim[j] = instante
+            servidor[j] = s
+            em_atendimento[s] = None
+            versao[s] += 1
+            if fila:
+                _, k = heapq.heappop(fila)
+                iniciar(k, s, instante)
+            else:
+                heapq.heappush(ociosos, s)
+            continue
+
+        j = proximo
+        instante = lista_chegadas[j]
+        proximo += 1
+        if ociosos:
+            iniciar(j, heapq.heappop(ociosos), instante)
+            continue
+
+        # Paciente menos urgente em atendimento (entradas antigas são descartadas)
+        while atendidos[0][3] != versao[atendidos[0][2]]:
+            heapq.heappop(atendidos)
+        prioridade_pior, _, s, _ = atendidos[0]
+        if -prioridade_pior > lista_prioridades[j]:
+            heapq.heappop(atendidos)
+            interrompido, comeco = em_atendimento[s]
+            restante[interrompido] -= instante - comeco
+            heapq.heappush(fila, (lista_prioridades[interrompido], interrompido))
+            iniciar(j, s, instante)
+        else:
+            heapq.heappush(fila, (lista_prioridades[j], j))
+    return inicio, fim, servidor
+
+
+def simular_fila_prioridade(tempos_chegada: np.ndarray, tempos_atendimento: np.ndarray,
+                            prioridades: np.ndarray, num_servidores: int,
+                            preemptivo: bool = False) -> Dict[str, np.ndarray]:
+    """Simula a fila com classes de prioridade (menor valor = mais urgente)
+
+    Cada classe é atendida em ordem de chegada e as classes em ordem de
+    urgência, com filas de prioridade em heaps, em O(n log n). No modo
+    preemptivo, uma chegada mais urgente interrompe o atendimento menos
+    urgente em curso, que volta à fila e depois retoma o trabalho restante.
+    Retorna os mesmos campos de `simular_fila` mais a prioridade; `espera`
+    inclui todo o tempo fora de atendimento, e `inicio` é o primeiro início.
+    """
+    chegadas = np.asarray(tempos_chegada, dtype=float)
+    atendimentos = np.asarray(tempos_atendimento, dtype=float)
+    prioridades = np.asarray(prioridades)
+    c = max(1, int(num_servidores))
+    if preemptivo:
+        inicio, fim, servidor = _simular_prioridade_preemptiva(chegadas, atendimentos, prioridades, c)
+    else:
+        inicio, fim, servidor = _simular_prioridade_nao_preemptiva(chegadas, atendimentos, prioridades, c)
+
+    return {
+        'chegada': chegadas,
+        'inicio': inicio,
+        'fim': fim,
+        'espera': fim - chegadas - atendimentos,
+        'servidor': servidor,
+        'prioridade': prioridades
+    }
+
+
+def resumir_por_classe(traco: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Distribuição do tempo de espera por classe de prioridade"""
+    esperas = pd.DataFrame({'prioridade': traco['prioridade'], 'espera': traco['espera']})
+    grupos = esperas.groupby('prioridade')['espera']
+    resumo = grupos.agg(num_pacientes='count', media='mean', maximo='max')
+    resumo['p_espera'] = grupos.apply(lambda espera: float((espera > 1e-9).mean()))
+    for quantil in (0.5, 0.9, 0.95):
+        resumo[f'p{int(quantil * 100)}'] = grupos.quantile(quantil)
+    return resumo[['num_pacientes', 'media', 'p50', 'p90', 'p95', 'maximo', 'p_espera']]
+
+
+def calcular_metricas_mmc(lambda_: Union[float, np.ndarray], mu: Union[float, np.ndarray],
+                          num_servidores: Union[int, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Calcula as métricas M/M/c para vários cenários de uma só vez
+
+    `lambda_`, `mu` e `num_servidores` são escalares ou arrays compatíveis por
+    broadcasting. A probabilidade de espera usa a recursão de Erlang B,
+    B(k) = a·B(k-1) / (k + a·B(k-1)), que é estável para centenas de
+    servidores, e P0 é obtido em escala logarítmica (logaddexp) para evitar
+    overflow de a^c / c!. Cenários instáveis (rho >= 1) recebem fila infinita.
+    """
+    lambda_, mu, c = np.broadcast_arrays(np.asarray(lambda_, dtype=float),
+                                         np.asarray(mu, dtype=float),
+                                         np.maximum(np.asarray(num_servidores, dtype=np.int64), 1))
+    a = lambda_ / mu          # Carga oferecida (erlangs)
+    rho = a / c               # Utilização por servidor
+    instavel = rho >= 1
+
+    # Recursão de Erlang B e, em paralelo, log da soma de a^n/n! para n = 0..c.
+    # Os cenários são ordenados por c decrescente, de modo que os ainda ativos
+    # no passo k formam um prefixo e cada passo opera só sobre uma fatia.
+    ordem = np.argsort(-c, axis=None, kind='stable')
+    c_ordenado = c.ravel()[ordem]
+    a_ordenado = a.ravel()[ordem]
+    c_maximo = int(c_ordenado[0]) if c_ordenado.size else 0
+    ativos_por_k = np.searchsorted(-c_ordenado, -np.arange(c_maximo + 1), side='right')
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        log_a = np.log(a_ordenado)
+        erlang_b = np.ones(a_ordenado.shape)
+        log_termo = np.zeros(a_ordenado.shape)
+        log_soma = np.zeros(a_ordenado.shape)
+        for k in range(1, c_maximo + 1):
+            m = ativos_por_k[k]
+            a_k = a_ordenado[:m]
+            b_k = erlang_b[:m]
+            erlang_b[:m] = a_k * b_k / (k + a_k * b_k)
+            log_termo[:m] += log_a[:m] - math.log(k)
+            log_soma[:m] = np.logaddexp(log_soma[:m], log_termo[:m])
+
+        # Volta à ordem e ao formato originais
+        inversa = np.empty_like(ordem)
+        inversa[ordem] = np.arange(len(ordem))
+        erlang_b = erlang_b[inversa].reshape(a.shape)
+        log_soma = log_soma[inversa].reshape(a.shape)
+
+        P0 = np.exp(-log_soma) / (1 - erlang_b + erlang_b / (1 - rho))
+
+        # Probabilidade de espera (Fórmula de Erlang C)
+        P_espera = erlang_b / (1 - rho * (1 - erlang_b))
+        Lq = P_espera * rho / (1 - rho)
+        Wq = Lq / lambda_
+        W = Wq + 1 / mu
+        L = lambda_ * W
+
+    return {
+        'P0': np.where(instavel, 0.0, P0),
+        'P_espera': np.where(instavel, 1.0, P_espera),
+        'Lq': np.where(instavel, np.inf, Lq),
+        'Wq': np.where(instavel, np.inf, Wq),
+        'W': np.where(instavel, np.inf, W),
+        'L': np.where(instavel, np.inf, L),
+        'utilizacao': np.where(instavel, 1.0, rho),
+        'lambda': np.array(lambda_),
+        'mu': np.array(mu),
+        'rho': np.where(instavel, np.inf, rho)
+    }
+
+
+def calcular_linha_tempo(traco: Dict[str, np.ndarray], num_servidores: int) -> dict:
+    """Calcula a evolução da fila e a ocupação dos servidores a partir de um traço
+
+    Os instantes de chegada (+1) e saída (-1) são ordenados juntos com um
+    argsort estável, de modo que em empates as chegadas vêm antes das saídas,
+    e a soma acumulada dos deltas dá o número de pacientes no sistema após
+    cada evento. Retorna também as médias ponderadas pelo tempo de fila (Lq)
+    e de sistema (L), o tempo ocupado de cada servidor e a utilização,
+    comparáveis aos valores analíticos de `SimuladorFilas.simular`.
+    """
+    c = max(1, int(num_servidores))
+    chegadas = np.asarray(traco['chegada'], dtype=float)
+    saidas = np.asarray(traco['fim'], dtype=float)
+    n = len(chegadas)
+
+    tempos = np.concatenate([chegadas, saidas])
+    deltas = np.concatenate([np.ones(n, dtype=np.int64), np.full(n, -1, dtype=np.int64)])
+    ordem = np.argsort(tempos, kind='stable')
+    tempos = tempos[ordem]
+    no_sistema = np.cumsum(deltas[ordem])
+    fila = np.maximum(no_sistema - c, 0)  # fila = clientes além dos servidores
+
+    # Médias temporais no horizonte [0, última saída]; antes da primeira
+    # chegada o sistema está vazio e não contribui para as áreas
+    horizonte = tempos[-1] if n else 0.0
+    duracoes = np.diff(tempos)
+    ocupacao_servidores = np.bincount(traco['servidor'], weights=saidas - traco['inicio'], minlength=c)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Lq = float(np.dot(fila[:-1], duracoes) / horizonte)
+        L = float(np.dot(no_sistema[:-1], duracoes) / horizonte)
+        utilizacao = float(ocupacao_servidores.sum() / (c * horizonte))
+
+    return {
+        'tempos': tempos,
+        'no_sistema': no_sistema,
+        'fila': fila,
+        'Lq': Lq,
+        'L': L,
+        'ocupacao_servidores': ocupacao_servidores,
+        'utilizacao': utilizacao
+    }
+
+
+def analisar_janelas(tempos_chegada: np.ndarray, tempos_atendimento: np.ndarray, num_servidores: int,
+                     largura_janela: float = 60.0, passo: Optional[float] = None) -> pd.DataFrame:
+    """Calcula λ, μ e as métricas M/M/c por janela de tempo
+
+    Os pacientes são posicionados na linha do tempo pela soma acumulada dos
+    intervalos entre chegadas e agrupados em faixas de `passo` (por padrão, a
+    própria largura) com np.bincount. Janelas deslizantes de `largura_janela`
+    são obtidas por diferença de somas prefixadas, então o custo é O(n) mais
+    O(1) por janela, independentemente da sobreposição. λ é o número de
+    chegadas por unidade de tempo coberta pelos dados na janela e μ o
+    inverso do atendimento médio dos pacientes que chegaram nela; janelas
+    vazias recebem NaN. Como o traço costuma terminar no meio da última
+    janela, a coluna 'duracao' traz o tempo coberto, `min(fim, última
+    chegada) - inicio`, que é o denominador de λ (nas demais, a largura).
+    """
+    passo = passo or largura_janela
+    faixas_por_janela = int(round(largura_janela / passo))
+    if faixas_por_janela < 1 or not math.isclose(faixas_por_janela * passo, largura_janela):
+        raise ValueError("A largura da janela deve ser um múltiplo inteiro do passo")
+
+    chegadas = np.cumsum(np.asarray(tempos_chegada, dtype=float))
+    faixa = (chegadas // passo).astype(np.int64)
+    num_faixas = int(faixa.max()) + 1 if len(faixa) else 0
+    contagem = np.bincount(faixa, minlength=num_faixas)
+    soma_atendimento = np.bincount(faixa, weights=tempos_atendimento, minlength=num_faixas)
+
+    # Somas deslizantes sobre `faixas_por_janela` faixas consecutivas
+    acumulada_contagem = np.concatenate([[0], np.cumsum(contagem)])
+    acumulada_atendimento = np.concatenate([[0.0], np.cumsum(soma_atendimento)])
+    num_janelas = max(num_faixas - faixas_por_janela + 1, 1 if num_faixas else 0)
+    inicio = np.arange(num_janelas)
+    fim = np.minimum(inicio + faixas_por_janela, num_faixas)
+    pacientes = acumulada_contagem[fim] - acumulada_contagem[inicio]
+    atendimento = acumulada_atendimento[fim] - acumulada_atendimento[inicio]
+
+    # Janelas finais parciais: o tempo coberto vai só até a última chegada
+    inicio_tempo = inicio * passo
+    duracao = np.minimum(inicio_tempo + largura_janela, chegadas[-1] if len(chegadas) else 0.0) - inicio_tempo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lambda_ = np.where((pacientes > 0) & (duracao > 0), pacientes / duracao, np.nan)
+        mu = np.where(pacientes > 0, pacientes / atendimento, np.nan)
+    metricas = calcular_metricas_mmc(lambda_, mu, num_servidores)
+
+    tabela = pd.DataFrame(metricas)
+    tabela.insert(0, 'num_pacientes', pacientes)
+    tabela.insert(0, 'duracao', duracao)
+    tabela.insert(0, 'fim', inicio_tempo + largura_janela)
+    tabela.insert(0, 'inicio', inicio_tempo)
+    return tabela
+
+
+# Métricas estimadas em cada replicação, na ordem das colunas devolvidas
+METRICAS_REPLICACAO = ['Wq', 'Lq', 'W', 'L', 'utilizacao']
+# Formas de gerar os pacientes das replicações
+METODOS_AMOSTRAGEM = ['bootstrap', 'exponencial', 'ajustado']
+
+
+def metricas_traco(traco: Dict[str, np.ndarray], num_servidores: int) -> np.ndarray:
+    """Resume um traço simulado nas métricas de METRICAS_REPLICACAO
+
+    As médias temporais (Lq, L e utilização) dividem o tempo acumulado pelo
+    horizonte da simulação, do instante 0 até a última saída.
+    """
+    horizonte = traco['fim'].max()
+    espera_total = traco['espera'].sum()
+    sistema_total = (traco['fim'] - traco['chegada']).sum()
+    ocupado_total = (traco['fim'] - traco['inicio']).sum()
+    n = len(traco['espera'])
+    return np.array([
+        espera_total / n,
+        espera_total / horizonte,
+        sistema_total / n,
+        sistema_total / horizonte,
+        ocupado_total / (max(1, int(num_servidores)) * horizonte)
+    ])
+
+
+def _executar_replicacoes(sementes: List[np.random.SeedSequence], metodo: str,
+                          chegadas: np.ndarray, atendimentos: np.ndarray,
+                          num_pacientes: int, num_servidores: int) -> np.ndarray:
+    """Executa um lote de replicações independentes (usado pelos processos)
+
+    Para o método 'exponencial', `chegadas` e `atendimentos` trazem apenas as
+    médias; para 'bootstrap', as amostras observadas a serem reamostradas; para
+    'ajustado', as `DistribuicaoAjustada` escolhidas para cada coluna.
+    """
+    resultados = np.empty((len(sementes), len(METRICAS_REPLICACAO)))
+    for i, semente in enumerate(sementes):
+        rng = np.random.default_rng(semente)
+        if metodo == 'exponencial':
+            intervalos = rng.exponential(chegadas[0], num_pacientes)
+            duracoes = rng.exponential(atendimentos[0], num_pacientes)
+        elif metodo == 'ajustado':
+            intervalos = chegadas.amostrar(rng, num_pacientes)
+            duracoes = atendimentos.amostrar(rng, num_pacientes)
+        else:
+            intervalos = chegadas[rng.integers(0, len(chegadas), num_pacientes)]
+            duracoes = atendimentos[rng.integers(0, len(atendimentos), num_pacientes)]
+        traco = simular_fila(np.cumsum(intervalos), duracoes, num_servidores)
+        resultados[i] = metricas_traco(traco, num_servidores)
+    return resultados
+
+
+def _intervalo_t(valores: np.ndarray, confianca: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Média e margem do intervalo t-Student ao longo do primeiro eixo"""
+    from scipy import stats
+
+    valores = np.asarray(valores, dtype=float)
+    n = len(valores)
+    medias = valores.mean(axis=0)
+    if n < 2:
+        return medias, np.full(np.shape(medias), float('nan'))
+    erro_padrao = valores.std(axis=0, ddof=1) / math.sqrt(n)
+    return medias, stats.t.ppf((1 + confianca) / 2, n - 1) * erro_padrao
+
+
+def _inversa(uniformes: np.ndarray, metodo: str, parametro: np.ndarray) -> np.ndarray:
+    """Converte uniformes em amostras pela inversa da distribuição
+
+    No método 'exponencial', `parametro` traz a média; em 'bootstrap', as
+    amostras observadas já ordenadas, cuja inversa é o quantil empírico; em
+    'ajustado', a distribuição ajustada. Como a inversa é monótona, 1 - U gera
+    a variável antitética de U.
+    """
+    if metodo == 'exponencial':
+        return -parametro[0] * np.log1p(-uniformes)
+    if metodo == 'ajustado':
+        return parametro.inversa(uniformes)
+    indices = np.minimum((uniformes * len(parametro)).astype(np.int64), len(parametro) - 1)
+    return parametro[indices]
+
+
+def _preparar_entradas(metodo: str, chegadas: np.ndarray, atendimentos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Valida o método e ordena as amostras usadas pela inversa"""
+    if metodo not in METODOS_AMOSTRAGEM:
+        raise ValueError(f"O método deve ser um de {METODOS_AMOSTRAGEM}")
+    if metodo == 'exponencial':
+        return np.asarray(chegadas, dtype=float)[:1], np.asarray(atendimentos, dtype=float)[:1]
+    if metodo == 'ajustado':
+        return chegadas, atendimentos
+    return np.sort(chegadas), np.sort(atendimentos)
+
+
+def detectar_aquecimento(valores: np.ndarray, tamanho_lote: int = 5) -> int:
+    """Número de observações iniciais a descartar pela regra MSER-m
+
+    Os valores são agrupados em lotes de `tamanho_lote` e o truncamento d
+    (em lotes) minimiza MSER(d) = Σ_{i>d} (Y_i - Ȳ_d)² / (k - d)², limitado à
+    primeira metade dos lotes. Todas as somas de cauda saem de duas somas
+    acumuladas, em O(n).
+    """
+    valores = np.asarray(valores, dtype=float)
+    k = len(valores) // tamanho_lote
+    if k < 4:
+        return 0
+    lotes = valores[:k * tamanho_lote].reshape(k, tamanho_lote).mean(axis=1)
+    lotes = lotes - lotes.mean()  # Reduz o cancelamento numérico nas somas de quadrados
+    soma = np.cumsum(lotes[::-1])[::-1]
+    soma_quadrados = np.cumsum((lotes ** 2)[::-1])[::-1]
+    restantes = np.arange(k, 0, -1)
+    desvios = np.maximum(soma_quadrados - soma ** 2 / restantes, 0)
+    mser = desvios / restantes ** 2
+    return int(np.argmin(mser[:k // 2])) * tamanho_lote
+
+
+def medias_em_lotes(valores: np.ndarray, num_lotes: int = 20, confianca: float = 0.95) -> dict:
+    """Intervalo de confiança pelo método das médias em lotes
+
+    Divide uma execução longa em `num_lotes` lotes contíguos (descartando o
+    resto no início) e aplica o intervalo t às médias dos lotes, que são
+    aproximadamente independentes quando os lotes são longos. Uma matriz com
+    uma linha por execução (ex.: o par antitético) tem as médias de lote
+    combinadas antes do intervalo.
+    """
+    valores = np.atleast_2d(np.asarray(valores, dtype=float))
+    tamanho_lote = valores.shape[1] // num_lotes
+    if tamanho_lote == 0 or num_lotes < 2:
+        return {'media': float('nan'), 'ic_inferior': float('nan'), 'ic_superior': float('nan'),
+                'meia_largura': float('nan'), 'num_lotes': num_lotes, 'tamanho_lote': tamanho_lote}
+    usados = valores[:, valores.shape[1] - num_lotes * tamanho_lote:]
+    lotes = usados.reshape(len(valores), num_lotes, tamanho_lote).mean(axis=2).mean(axis=0)
+    media, margem = _intervalo_t(lotes, confianca)
+    return {
+        'media': float(media),
+        'ic_inferior': float(media - margem),
+        'ic_superior': float(media + margem),
+        'meia_largura': float(margem),
+        'num_lotes': num_lotes,
+        'tamanho_lote': tamanho_lote
+    }
+
+
+def simular_ate_precisao(chegadas: np.ndarray, atendimentos: np.ndarray, num_servidores: int,
+                         meia_largura_alvo: float, relativa: bool = False, metodo: str = 'bootstrap',
+                         antiteticas: bool = True, confianca: float = 0.95, num_lotes: int = 20,
+                         pacientes_iniciais: int = 10_000, max_pacientes: int = 10_000_000,
+                         semente: Optional[int] = None) -> dict:
+    """Estende uma única execução longa até o IC de Wq atingir a precisão desejada
+
+    A cada rodada o aquecimento é removido por MSER-5 e o intervalo de Wq é
+    obtido por médias em lotes. Se a meia-largura ainda exceder
+    `meia_largura_alvo` (fração da média quando `relativa=True`), o número de
+    pacientes é ampliado pela projeção 1/√n e a execução é refeita sobre o
+    mesmo fluxo de números aleatórios, estendido. Com `antiteticas=True`, uma
+    segunda execução usa 1 - U em todas as amostras e as duas são combinadas.
+    `chegadas` e `atendimentos` seguem a convenção de `_executar_replicacoes`.
+    """
+    chegadas, atendimentos = _preparar_entradas(metodo, chegadas, atendimentos)
+    rng = np.random.default_rng(semente)
+    uniformes = np.empty((2, 0))
+    num_pacientes = min(int(pacientes_iniciais), int(max_pacientes))
+
+    while True:
+        # Estende o fluxo existente, preservando as amostras já usadas
+        uniformes = np.hstack([uniformes, rng.random((2, num_pacientes - uniformes.shape[1]))])
+        execucoes = [uniformes, 1 - uniformes] if antiteticas else [uniformes]
+        esperas = np.vstack([
+            simular_fila(np.cumsum(_inversa(u[0], metodo, chegadas)), _inversa(u[1], metodo, atendimentos),
+                         num_servidores)['espera']
+            for u in execucoes
+        ])
+        aquecimento = detectar_aquecimento(esperas.mean(axis=0))
+        intervalo = medias_em_lotes(esperas[:, aquecimento:], num_lotes, confianca)
+
+        alvo = meia_largura_alvo * abs(intervalo['media']) if relativa else meia_largura_alvo
+        atingiu_meta = intervalo['meia_largura'] <= alvo
+        if atingiu_meta or num_pacientes >= max_pacientes:
+            break
+        # Meia-largura ~ 1/√n: projeta o tamanho necessário, com crescimento limitado
+        fator = (intervalo['meia_largura'] / alvo) ** 2 if alvo > 0 else 4.0
+        fator = min(max(1.1 * fator, 1.5), 4.0)
+        num_pacientes = min(int(max_pacientes), aquecimento + int((num_pacientes - aquecimento) * fator))
+
+    return {
+        'Wq': {chave: intervalo[chave] for chave in ['media', 'ic_inferior', 'ic_superior', 'meia_largura']},
+        'pacientes': num_pacientes,
+        'execucoes': len(execucoes),
+        'aquecimento': aquecimento,
+        'tamanho_lote': intervalo['tamanho_lote'],
+        'atingiu_meta': bool(atingiu_meta)
+    }
+
+
+def comparar_servidores(chegadas: np.ndarray, atendimentos: np.ndarray, lista_servidores: List[int],
+                        num_replicacoes: int = 20, num_pacientes: int = 10_000, metodo: str = 'bootstrap',
+                        antiteticas: bool = True, confianca: float = 0.95,
+                        semente: Optional[int] = None) -> pd.DataFrame:
+    """Compara números de servidores com números aleatórios comuns
+
+    Em cada replicação todos os cenários recebem exatamente os mesmos
+    pacientes, de modo que as diferenças entre cenários têm variância muito
+    menor que com fluxos independentes. Com `antiteticas=True` cada
+    replicação é a média do par U / 1 - U. Retorna, por número de servidores,
+    as médias de METRICAS_REPLICACAO, o IC de Wq e o IC pareado da redução de
+    Wq em relação ao cenário anterior da lista.
+    """
+    chegadas, atendimentos = _preparar_entradas(metodo, chegadas, atendimentos)
+    lista_servidores = [max(1, int(c)) for c in lista_servidores]
+    valores = np.zeros((num_replicacoes, len(lista_servidores), len(METRICAS_REPLICACAO)))
+    for r, semente_replicacao in enumerate(np.random.SeedSequence(semente).spawn(num_replicacoes)):
+        uniformes = np.random.default_rng(semente_replicacao).random((2, num_pacientes))
+        execucoes = [uniformes, 1 - uniformes] if antiteticas else [uniformes]
+        for u in execucoes:
+            chegadas_abs = np.cumsum(_inversa(u[0], metodo, chegadas))
+            duracoes = _inversa(u[1], metodo, atendimentos)
+            for j, c in enumerate(lista_servidores):
+                valores[r, j] += metricas_traco(simular_fila(chegadas_abs, duracoes, c), c) / len(execucoes)
+
+    medias, margens = _intervalo_t(valores, confianca)
+    tabela = pd.DataFrame(medias, columns=METRICAS_REPLICACAO,
+                          index=pd.Index(lista_servidores, name='num_servidores'))
+    tabela.insert(1, 'Wq_ic_inferior', medias[:, 0] - margens[:, 0])
+    tabela.insert(2, 'Wq_ic_superior', medias[:, 0] + margens[:, 0])
+
+    # Diferenças pareadas: a mesma replicação em cenários consecutivos
+    reducao = np.full(len(lista_servidores), float('nan'))
+    margem_reducao = np.full(len(lista_servidores), float('nan'))
+    if len(lista_servidores) > 1:
+        reducao[1:], margem_reducao[1:] = _intervalo_t(valores[:, :-1, 0] - valores[:, 1:, 0], confianca)
+    tabela['reducao_Wq'] = reducao
+    tabela['reducao_ic_inferior'] = reducao - margem_reducao
+    tabela['reducao_ic_superior'] = reducao + margem_reducao
+    return tabela
+
 
 class SimuladorFilas:
     def __init__(self, num_servidores: int):
         self.num_servidores = max(1, num_servidores)  # Garantir pelo menos 1 servidor
         self.tempos_chegada = []
         self.tempos_atendimento = []
+        self.prioridades = None  # Classe de prioridade opcional (1 = mais urgente)
+        self.distribuicoes = None  # (chegada, atendimento) escolhidas por ajustar_distribuicoes
         self.fila = []
         self.servidores = [0] * num_servidores
         self.dados_carregados = False
+        # Médias usadas pelo modelo analítico (também disponíveis sem os traços)
+        self.num_pacientes = 0
+        self.media_chegada = float('nan')
+        self.media_atendimento = float('nan')
         
-    def carregar_dados(self, dados: Union[str, pd.DataFrame]):
-        """Carrega dados do arquivo CSV ou DataFrame"""
+    def carregar_dados(self, dados: Union[str, pd.DataFrame, np.ndarray], tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+                       manter_tracos: bool = True):
+        """Carrega dados do arquivo CSV, DataFrame ou dataset colunar
+
+        Arquivos são lidos em blocos de `tamanho_bloco` linhas, validados e
+        filtrados um a um. A coluna opcional 'prioridade' (inteiro positivo,
+        1 = mais urgente) é mantida quando presente. Com `manter_tracos=False` apenas as médias são
+        mantidas, o que basta para `simular` com memória limitada. Uma matriz
+        vinda de `carregar_dataset` já está validada e é usada sem cópia.
+        """
         try:
-            if isinstance(dados, str):
-                # Se for um caminho de arquivo (string)
-                df = pd.read_csv(dados)
+            if isinstance(dados, np.ndarray):
+                # Dataset colunar já validado (possivelmente mapeado em memória);
+                # uma terceira coluna, se houver, traz a prioridade
+                valores = dados
+                num_pacientes = len(valores)
+                medias = valores.mean(axis=0) if num_pacientes else None
+            elif isinstance(dados, pd.DataFrame):
+                # Validação dos dados
+                if 'tempo_chegada' not in dados.columns or 'tempo_atendimento' not in dados.columns:
+                    raise ValueError("O DataFrame deve conter as colunas 'tempo_chegada' e 'tempo_atendimento'")
+                # Remover valores nulos ou negativos sem copiar o DataFrame inteiro
+                colunas = COLUNAS_TEMPO + ([COLUNA_PRIORIDADE] if COLUNA_PRIORIDADE in dados.columns else [])
+                valores = filtrar_bloco(dados, colunas)
+                num_pacientes = len(valores)
+                medias = valores.mean(axis=0) if num_pacientes else None
             else:
-                # Se for um DataFrame
-                df = dados.copy()
-            
-            # Validação dos dados
-            if 'tempo_chegada' not in df.columns or 'tempo_atendimento' not in df.columns:
-                raise ValueError("O DataFrame deve conter as colunas 'tempo_chegada' e 'tempo_atendimento'")
-                
-            # Remover valores nulos ou negativos
-            df = df.dropna(subset=['tempo_chegada', 'tempo_atendimento'])
-            df = df[(df['tempo_chegada'] > 0) & (df['tempo_atendimento'] > 0)]
+                # Caminho de arquivo ou buffer: leitura em fluxo
+                colunas = COLUNAS_TEMPO + ([COLUNA_PRIORIDADE] if COLUNA_PRIORIDADE in ler_cabecalho(dados) else [])
+                valores, acumulador = carregar_em_blocos(dados, colunas, tamanho_bloco, manter_tracos)
+                num_pacientes = acumulador.n
+                medias = acumulador.media
             
-            if df.empty:
+            if num_pacientes == 0:
                 raise ValueError("Não há dados válidos após a filtragem")
                 
-            self.tempos_chegada = df['tempo_chegada'].values
-            self.tempos_atendimento = df['tempo_atendimento'].values
+            if manter_tracos:
+                # Em ordem de colunas as fatias já são contíguas e não há cópia
+                self.tempos_chegada = np.ascontiguousarray(valores[:, 0])
+                self.tempos_atendimento = np.ascontiguousarray(valores[:, 1])
+                self.prioridades = valores[:, 2].astype(np.int64) if valores.shape[1] > 2 else None
+            else:
+                self.tempos_chegada = []
+                self.tempos_atendimento = []
+                self.prioridades = None
+            self.distribuicoes = None
+            self.num_pacientes = num_pacientes
+            self.media_chegada = float(medias[0])
+            self.media_atendimento = float(medias[1])
             self.dados_carregados = True
             return True
         except Exception as e:
@@ -46,66 +668,167 @@ class SimuladorFilas:
     def simular(self) -> dict:
         """Executa a simulação e retorna as métricas"""
         # Verificar se os dados foram carregados
-        if not self.dados_carregados or len(self.tempos_chegada) == 0 or len(self.tempos_atendimento) == 0:
+        if not self.dados_carregados or self.num_pacientes == 0:
             return self._resultados_vazios()
 
         try:
             # Cálculo das taxas
-            lambda_ = 1 / np.mean(self.tempos_chegada)  # Taxa de chegada (clientes por unidade de tempo)
-            mu = 1 / np.mean(self.tempos_atendimento)   # Taxa de serviço por servidor
-            c = self.num_servidores                     # Número de servidores
+            lambda_ = 1 / self.media_chegada      # Taxa de chegada (clientes por unidade de tempo)
+            mu = 1 / self.media_atendimento       # Taxa de serviço por servidor
 
-            # Intensidade de tráfego do sistema
-            rho = lambda_ / (c * mu)  # Utilização por servidor
-
-            # Verificar estabilidade do sistema
-            if rho >= 1:
-                return self._resultados_sistema_instavel()
-
-            # Cálculo de P0 (Probabilidade do sistema estar vazio)
-            sum_val = 0
-            for n in range(c):
-                sum_val += (lambda_ / mu)**n / math.factorial(n)
-            
-            # Termo adicional para P0
-            term2 = (lambda_ / mu)**c / (math.factorial(c) * (1 - rho))
-            P0 = 1 / (sum_val + term2)
-
-            # Probabilidade de espera (Fórmula de Erlang C)
-            P_espera = ((lambda_ / mu)**c / (math.factorial(c) * (1 - rho))) * P0
-            
-            # Número médio de clientes na fila (Lq)
-            Lq = P_espera * (lambda_ / mu) * rho / (1 - rho)
-            
-            # Tempo médio de espera na fila (Wq)
-            Wq = Lq / lambda_
-            
-            # Tempo médio no sistema (W)
-            W = Wq + (1 / mu)
-            
-            # Número médio de clientes no sistema (L)
-            L = lambda_ * W
-            
-            # Utilização do sistema
-            utilizacao = lambda_ / (c * mu)
-            
-            resultados = {
-                'P0': P0,                  # Probabilidade do sistema estar vazio
-                'P_espera': P_espera,      # Probabilidade de espera
-                'Lq': Lq,                  # Número médio na fila
-                'Wq': Wq,                  # Tempo médio de espera
-                'W': W,                     # Tempo médio no sistema
-                'L': L,                     # Número médio no sistema
-                'utilizacao': utilizacao,   # Utilização do sistema
-                'lambda': lambda_,          # Taxa de chegada
-                'mu': mu,                   # Taxa de serviço
-                'rho': rho                  # Intensidade de tráfego por servidor
-            }
-            return resultados
+            # Métricas M/M/c pelo núcleo vetorizado, aplicado a um único cenário
+            metricas = calcular_metricas_mmc(lambda_, mu, self.num_servidores)
+            return {chave: float(valor) for chave, valor in metricas.items()}
         except Exception as e:
             print(f"Erro na simulação: {e}")
             return self._resultados_vazios()
     
+    def simular_eventos(self) -> Optional[Dict[str, np.ndarray]]:
+        """Executa a simulação por eventos sobre o traço carregado
+
+        Retorna, por paciente, os instantes de chegada, início e fim do
+        atendimento, o tempo de espera e o servidor atribuído. Requer que os
+        traços tenham sido mantidos no carregamento.
+        """
+        if not self.dados_carregados or len(self.tempos_chegada) == 0:
+            return None
+        return simular_fila(np.cumsum(self.tempos_chegada), self.tempos_atendimento,
+                            self.num_servidores)
+
+    def simular_eventos_prioridade(self, preemptivo: bool = False) -> Optional[Dict[str, np.ndarray]]:
+        """Executa a simulação por eventos respeitando as classes de prioridade
+
+        Veja `simular_fila_prioridade`; requer a coluna 'prioridade' nos dados.
+        Use `resumir_por_classe` para a distribuição das esperas por classe.
+        """
+        if not self.dados_carregados or len(self.tempos_chegada) == 0:
+            return None
+        if self.prioridades is None:
+            raise ValueError(f"Os dados não possuem a coluna '{COLUNA_PRIORIDADE}'")
+        return simular_fila_prioridade(np.cumsum(self.tempos_chegada), self.tempos_atendimento,
+                                       self.prioridades, self.num_servidores, preemptivo)
+
+    def simular_por_janela(self, largura_janela: float = 60.0, passo: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """Executa o modelo M/M/c separadamente para cada janela de tempo
+
+        Veja `analisar_janelas`; requer os traços carregados.
+        """
+        if not self.dados_carregados or len(self.tempos_chegada) == 0:
+            return None
+        return analisar_janelas(self.tempos_chegada, self.tempos_atendimento, self.num_servidores,
+                                largura_janela, passo)
+
+    def simular_replicacoes(self, num_replicacoes: int = 100, num_pacientes: Optional[int] = None,
+                            metodo: str = 'bootstrap', semente: Optional[int] = None,
+                            confianca: float = 0.95, num_processos: Optional[int] = None) -> Optional[dict]:
+        """Estima as métricas por Monte Carlo com replicações independentes
+
+        Cada replicação amostra `num_pacientes` intervalos entre chegadas e
+        tempos de atendimento, seja por distribuição exponencial com as médias
+        observadas (`metodo='exponencial'`), seja por reamostragem dos dados
+        carregados (`metodo='bootstrap'`), seja pelas distribuições escolhidas
+        em `ajustar_distribuicoes` (`metodo='ajustado'`), e simula a fila por eventos. As
+        replicações são distribuídas entre `num_processos` processos; cada uma
+        recebe sua própria semente derivada de `semente`, então o resultado é
+        o mesmo para qualquer número de processos.
+
+        Retorna, para cada métrica, a média entre replicações e o intervalo de
+        confiança t-Student no nível `confianca`.
+        """
+        if not self.dados_carregados or self.num_pacientes == 0:
+            return None
+        chegadas, atendimentos = self._entradas_amostragem(metodo)
+        num_pacientes = int(num_pacientes or self.num_pacientes)
+        sementes = np.random.SeedSequence(semente).spawn(num_replicacoes)
+
+        num_processos = max(1, min(num_processos or os.cpu_count() or 1, num_replicacoes))
+        if num_processos == 1:
+            valores = _executar_replicacoes(sementes, metodo, chegadas, atendimentos,
+                                            num_pacientes, self.num_servidores)
+        else:
+            # Um lote de replicações por processo para reduzir a serialização
+            lotes = [list(lote) for lote in np.array_split(np.array(sementes, dtype=object), num_processos)]
+            with ProcessPoolExecutor(max_workers=num_processos) as executor:
+                partes = executor.map(_executar_replicacoes, lotes,
+                                      [metodo] * num_processos, [chegadas] * num_processos,
+                                      [atendimentos] * num_processos, [num_pacientes] * num_processos,
+                                      [self.num_servidores] * num_processos)
+                valores = np.concatenate(list(partes))
+
+        medias, margem = _intervalo_t(valores, confianca)
+        resultados = {
+            metrica: {
+                'media': float(medias[j]),
+                'ic_inferior': float(medias[j] - margem[j]),
+                'ic_superior': float(medias[j] + margem[j])
+            }
+            for j, metrica in enumerate(METRICAS_REPLICACAO)
+        }
+        resultados['replicacoes'] = num_replicacoes
+        return resultados
+
+    def simular_com_precisao(self, meia_largura_alvo: float, relativa: bool = False, metodo: str = 'bootstrap',
+                             antiteticas: bool = True, confianca: float = 0.95,
+                             max_pacientes: int = 10_000_000, semente: Optional[int] = None) -> Optional[dict]:
+        """Estima Wq em uma execução longa até o IC atingir `meia_largura_alvo`
+
+        Veja `simular_ate_precisao`; o aquecimento é detectado e descartado
+        automaticamente.
+        """
+        if not self.dados_carregados or self.num_pacientes == 0:
+            return None
+        chegadas, atendimentos = self._entradas_amostragem(metodo)
+        return simular_ate_precisao(chegadas, atendimentos, self.num_servidores, meia_largura_alvo,
+                                    relativa=relativa, metodo=metodo, antiteticas=antiteticas,
+                                    confianca=confianca, max_pacientes=max_pacientes, semente=semente)
+
+    def comparar_servidores(self, lista_servidores: List[int], num_replicacoes: int = 20,
+                            num_pacientes: Optional[int] = None, metodo: str = 'bootstrap',
+                            antiteticas: bool = True, confianca: float = 0.95,
+                            semente: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """Compara cenários de número de servidores com números aleatórios comuns
+
+        Veja `comparar_servidores`; por padrão cada replicação tem o número
+        de pacientes carregado.
+        """
+        if not self.dados_carregados or self.num_pacientes == 0:
+            return None
+        chegadas, atendimentos = self._entradas_amostragem(metodo)
+        return comparar_servidores(chegadas, atendimentos, lista_servidores, num_replicacoes,
+                                   int(num_pacientes or self.num_pacientes), metodo, antiteticas,
+                                   confianca, semente)
+
+    def ajustar_distribuicoes(self, familias: List[str] = FAMILIAS,
+                              criterio: str = 'ad') -> Optional[Dict[str, pd.DataFrame]]:
+        """Ajusta distribuições aos tempos entre chegadas e de atendimento
+
+        A mais aderente de cada coluna (veja `ajustar_distribuicoes` em
+        `ajuste`) fica em `self.distribuicoes` e passa a gerar os pacientes
+        das replicações com `metodo='ajustado'`. Retorna a tabela de cada coluna.
+        """
+        if not self.dados_carregados or len(self.tempos_chegada) == 0:
+            return None
+        tabelas = {
+            COLUNAS_TEMPO[0]: ajustar_distribuicoes(self.tempos_chegada, familias, criterio),
+            COLUNAS_TEMPO[1]: ajustar_distribuicoes(self.tempos_atendimento, familias, criterio)
+        }
+        self.distribuicoes = tuple(tabela['distribuicao'].iloc[0] for tabela in tabelas.values())
+        return tabelas
+
+    def _entradas_amostragem(self, metodo: str) -> tuple:
+        """Médias ('exponencial'), amostras observadas ('bootstrap') ou distribuições ('ajustado')"""
+        if metodo not in METODOS_AMOSTRAGEM:
+            raise ValueError(f"O método deve ser um de {METODOS_AMOSTRAGEM}")
+        if metodo == 'exponencial':
+            return np.array([self.media_chegada]), np.array([self.media_atendimento])
+        if metodo == 'ajustado':
+            if self.distribuicoes is None:
+                raise ValueError("Execute ajustar_distribuicoes antes de usar o método 'ajustado'")
+            return self.distribuicoes
+        if len(self.tempos_chegada) == 0:
+            raise ValueError("O método 'bootstrap' requer os traços carregados (manter_tracos=True)")
+        return np.asarray(self.tempos_chegada), np.asarray(self.tempos_atendimento)
+
     def _resultados_vazios(self) -> dict:
         """Retorna um dicionário com valores NaN para quando não há dados"""
         return {
@@ -121,40 +844,16 @@ class SimuladorFilas:
             'rho': float('nan')
         }
     
-    def _resultados_sistema_instavel(self) -> dict:
-        """Retorna resultados para um sistema instável (rho >= 1)"""
-        return {
-            'P0': 0,                 # Sistema nunca está vazio
-            'P_espera': 1,           # Sempre há espera
-            'Lq': float('inf'),      # Fila infinita
-            'Wq': float('inf'),      # Tempo de espera infinito
-            'W': float('inf'),       # Tempo no sistema infinito
-            'L': float('inf'),       # Número no sistema infinito
-            'utilizacao': 1,         # Utilização total
-            'lambda': 1 / np.mean(self.tempos_chegada),
-            'mu': 1 / np.mean(self.tempos_atendimento),
-            'rho': float('inf')      # Intensidade de tráfego infinita
-        }
-    
     def gerar_graficos(self):
-        """Gera visualizações da simulação"""
-        if not self.dados_carregados:
+        """Gera visualizações da simulação
+
+        Usa a mesma camada de renderização da interface (`graficos`), com os
+        histogramas calculados a partir das contagens.
+        """
+        if not self.dados_carregados or len(self.tempos_chegada) == 0:
             return None
-            
-        # Implementação básica de gráficos
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-        
-        # Histograma dos tempos de chegada
-        ax1.hist(self.tempos_chegada, bins=15, alpha=0.7, color='blue')
-        ax1.set_title('Distribuição dos Tempos entre Chegadas')
-        ax1.set_xlabel('Tempo (unidades)')
-        ax1.set_ylabel('Frequência')
-        
-        # Histograma dos tempos de atendimento
-        ax2.hist(self.tempos_atendimento, bins=15, alpha=0.7, color='green')
-        ax2.set_title('Distribuição dos Tempos de Atendimento')
-        ax2.set_xlabel('Tempo (unidades)')
-        ax2.set_ylabel('Frequência')
-        
-        plt.tight_layout()
-        return fig
\ No newline at end of file
+
+        # Matplotlib é importado apenas quando algum gráfico é gerado
+        from graficos import figura_histogramas
+
+        return figura_histogramas(self.tempos_chegada, self.tempos_atendimento, num_faixas=15)
@@ -0,0 +1,44 @@
+"""Consistência da simulação com classes de prioridade em traços com chegadas empatadas"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from simulacao import simular_fila, simular_fila_prioridade
+
+
+def gerar_tracos(semente: int, num_tracos: int = 100):
+    """Traços com instantes inteiros, em que muitos pacientes chegam juntos"""
+    rng = np.random.default_rng(semente)
+    for _ in range(num_tracos):
+        n = int(rng.integers(1, 200))
+        chegadas = np.cumsum(rng.integers(0, 3, n)).astype(float)
+        atendimentos = rng.integers(1, 8, n).astype(float)
+        yield chegadas, atendimentos, rng.integers(0, 3, n), int(rng.integers(1, 6))
+
+
+def test_exemplo_com_chegadas_empatadas():
+    traco = simular_fila_prioridade([0, 5, 5, 5], [1, 1, 1, 1], [2, 2, 1, 2], 2)
+    np.testing.assert_allclose(traco['inicio'], [0, 5, 5, 6])
+    np.testing.assert_allclose(traco['espera'], [0, 0, 0, 1])
+
+
+@pytest.mark.parametrize('preemptivo', [False, True])
+def test_ninguem_comeca_antes_de_chegar(preemptivo):
+    for chegadas, atendimentos, prioridades, c in gerar_tracos(2024):
+        traco = simular_fila_prioridade(chegadas, atendimentos, prioridades, c, preemptivo)
+        assert np.all(traco['inicio'] >= chegadas - 1e-9)
+        assert np.all(traco['espera'] >= -1e-9)
+
+
+@pytest.mark.parametrize('preemptivo', [False, True])
+def test_classe_unica_coincide_com_fifo(preemptivo):
+    for chegadas, atendimentos, _, c in gerar_tracos(2025):
+        fifo = simular_fila(chegadas, atendimentos, c)
+        traco = simular_fila_prioridade(chegadas, atendimentos, np.zeros(len(chegadas), dtype=np.int64),
+                                        c, preemptivo)
+        np.testing.assert_allclose(traco['inicio'], fifo['inicio'])
+        np.testing.assert_allclose(traco['fim'], fifo['fim'])